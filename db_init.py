@@ -89,14 +89,18 @@ def create_cafeteria_menu():
         ("Dinner", "Grilled Fish and Steamed Veggies", 180.00),
     ]
 
-    for i in range(7):
-        target_date = today + datetime.timedelta(days=i)
-        for m_type, desc, price in menu_templates:
-            CafeteriaMenu.objects.get_or_create(
-                day=target_date,
-                meal_type=m_type,
-                defaults={"description": desc, "price": Decimal(price)},
-            )
+    menus = [
+        CafeteriaMenu(
+            day=today + datetime.timedelta(days=i),
+            meal_type=m_type,
+            description=desc,
+            price=Decimal(price),
+        )
+        for i in range(7)
+        for m_type, desc, price in menu_templates
+    ]
+    # Existing (day, meal_type) rows are kept, mirroring the old get_or_create loop
+    CafeteriaMenu.objects.bulk_create(menus, ignore_conflicts=True)
     print("✓ 7-day Cafeteria menu generated.")
 
 
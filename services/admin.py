@@ -1,12 +1,19 @@
 from django.contrib import admin
+from .forms import ClassScheduleForm
 from .models import (
     BusRoute,
     BusSchedule,
     CafeteriaMenu,
     MealBooking,
+    MealHeadcount,
+    MealRedemption,
+    PaymentCallback,
+    TransactionArchive,
+    WalletMonthlySummary,
     Faculty,
     Course,
     ClassSchedule,
+    Enrollment,
     Club,
     Event,
     CampusBuilding,
@@ -20,6 +27,12 @@ class BusScheduleAdmin(admin.ModelAdmin):
     search_fields = ("route__route_name",)
 
 
+@admin.register(BusRoute)
+class BusRouteAdmin(admin.ModelAdmin):
+    list_display = ("route_name", "start_location", "end_location")
+    filter_horizontal = ("subscribers",)
+
+
 @admin.register(CafeteriaMenu)
 class CafeteriaMenuAdmin(admin.ModelAdmin):
     list_display = ("day", "meal_type", "price", "description")
@@ -27,14 +40,64 @@ class CafeteriaMenuAdmin(admin.ModelAdmin):
     date_hierarchy = "day"
 
 
+@admin.register(MealHeadcount)
+class MealHeadcountAdmin(admin.ModelAdmin):
+    list_display = ("day", "meal", "count")
+    list_filter = ("meal",)
+    date_hierarchy = "day"
+
+
+@admin.register(MealRedemption)
+class MealRedemptionAdmin(admin.ModelAdmin):
+    list_display = ("booking", "day", "meal", "station", "redeemed_at")
+    list_filter = ("meal", "station")
+    date_hierarchy = "day"
+    raw_id_fields = ("booking",)
+
+
+@admin.register(PaymentCallback)
+class PaymentCallbackAdmin(admin.ModelAdmin):
+    list_display = ("tran_id", "status", "attempts", "received_at", "processed_at")
+    list_filter = ("status",)
+    search_fields = ("tran_id",)
+    readonly_fields = ("payload", "transaction")
+
+
+@admin.register(WalletMonthlySummary)
+class WalletMonthlySummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "wallet",
+        "month",
+        "credit_total",
+        "credit_count",
+        "debit_total",
+        "debit_count",
+    )
+    date_hierarchy = "month"
+
+
+@admin.register(TransactionArchive)
+class TransactionArchiveAdmin(admin.ModelAdmin):
+    list_display = ("month", "row_count", "path", "created_at")
+    readonly_fields = ("month", "path", "row_count", "created_at")
+
+
 @admin.register(ClassSchedule)
 class ClassScheduleAdmin(admin.ModelAdmin):
-    list_display = ("course", "day_of_week", "start_time", "end_time")
+    list_display = ("course", "day_of_week", "start_time", "end_time", "room")
     list_filter = ("day_of_week", "course")
+    form = ClassScheduleForm
+
+
+@admin.register(Enrollment)
+class EnrollmentAdmin(admin.ModelAdmin):
+    list_display = ("user", "course", "enrolled_at")
+    list_filter = ("course",)
+    search_fields = ("user__username", "course__code")
+    raw_id_fields = ("user",)
 
 
 # Registering standard models
-admin.site.register(BusRoute)
 admin.site.register(MealBooking)
 admin.site.register(Faculty)
 admin.site.register(Course)
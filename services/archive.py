@@ -0,0 +1,213 @@
+# services/archive.py
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from itertools import groupby
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Transaction, TransactionArchive, TransactionArchiveSegment
+from .rollups import month_bounds
+
+CHECKPOINT = "Checkpoint"
+DELETE_BATCH_SIZE = 5000
+# Wallet ids per IN (...) lookup, well under SQLite's bound-parameter limit
+ID_CHUNK_SIZE = 1000
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def archive_dir():
+    path = Path(settings.TRANSACTION_ARCHIVE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def is_archived(month):
+    return TransactionArchive.objects.filter(month=month).exists()
+
+
+def _encode(row):
+    return json.dumps(
+        {
+            "id": row.id,
+            "wallet_id": row.wallet_id,
+            "timestamp": row.timestamp.isoformat(),
+            "amount": str(row.amount),
+            "tx_type": row.tx_type,
+            "description": row.description,
+            "idempotency_key": row.idempotency_key,
+        }
+    )
+
+
+def archive_month(month):
+    """
+    Moves one calendar month of Transaction rows into a segment file and
+    returns its TransactionArchive.
+
+    Each wallet's rows are written as a separate gzip member, so later reads
+    seek straight to one wallet's bytes instead of inflating the whole month.
+    Afterwards the rows are deleted in batches, and each wallet's Checkpoint
+    row is rolled forward by the month's net amount so balances still equal
+    the sum of the hot table.
+    """
+    latest = TransactionArchive.objects.order_by("-month").first()
+    if latest and latest.month >= month:
+        raise ArchiveError(
+            f"Months must be archived oldest first (after {latest.month:%Y-%m})."
+        )
+
+    start, end = month_bounds(month)
+    rows = Transaction.objects.filter(timestamp__gte=start, timestamp__lt=end).exclude(
+        tx_type=CHECKPOINT
+    )
+    directory = archive_dir()
+    filename = f"transactions-{month:%Y-%m}.ndjson.gz"
+
+    segments, nets = [], {}
+    row_count, max_id = 0, 0
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            stream = rows.order_by("wallet_id", "timestamp", "id").iterator(
+                chunk_size=DELETE_BATCH_SIZE
+            )
+            for wallet_id, entries in groupby(stream, key=lambda row: row.wallet_id):
+                lines, net = [], Decimal("0.00")
+                for entry in entries:
+                    lines.append(_encode(entry))
+                    net += entry.amount if entry.tx_type == "Credit" else -entry.amount
+                    max_id = max(max_id, entry.id)
+                member = gzip.compress(("\n".join(lines) + "\n").encode())
+                segments.append(
+                    TransactionArchiveSegment(
+                        wallet_id=wallet_id,
+                        offset=handle.tell(),
+                        length=len(member),
+                        row_count=len(lines),
+                    )
+                )
+                handle.write(member)
+                nets[wallet_id] = net
+                row_count += len(lines)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, directory / filename)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    try:
+        with transaction.atomic():
+            archive = TransactionArchive.objects.create(
+                month=month, path=filename, row_count=row_count
+            )
+            for segment in segments:
+                segment.archive = archive
+            TransactionArchiveSegment.objects.bulk_create(segments, batch_size=1000)
+
+            deleted = _delete_rows(rows.filter(id__lte=max_id))
+            if deleted != row_count:
+                raise ArchiveError(
+                    f"{month:%Y-%m}: wrote {row_count} rows but matched {deleted}."
+                )
+            _roll_checkpoints_forward(nets, end)
+    except BaseException:
+        (directory / filename).unlink(missing_ok=True)
+        raise
+    return archive
+
+
+def _delete_rows(rows):
+    # Batched so the delete collector never holds a whole month of objects
+    deleted = 0
+    while True:
+        ids = list(rows.values_list("id", flat=True)[:DELETE_BATCH_SIZE])
+        if not ids:
+            return deleted
+        Transaction.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+
+def _roll_checkpoints_forward(nets, end):
+    # Looked up per chunk of wallet ids; tx_type alone is unindexed
+    wallet_ids = list(nets)
+    existing = {}
+    for i in range(0, len(wallet_ids), ID_CHUNK_SIZE):
+        existing.update(
+            (checkpoint.wallet_id, checkpoint)
+            for checkpoint in Transaction.objects.filter(
+                wallet_id__in=wallet_ids[i : i + ID_CHUNK_SIZE],
+                tx_type=CHECKPOINT,
+            ).only("id", "wallet_id", "amount")
+        )
+    description = f"Balance brought forward to {end:%B %Y}"
+    for wallet_id, checkpoint in existing.items():
+        checkpoint.amount += nets[wallet_id]
+        checkpoint.timestamp = end
+        checkpoint.description = description
+    Transaction.objects.bulk_update(
+        existing.values(), ["amount", "timestamp", "description"], batch_size=1000
+    )
+    created = Transaction.objects.bulk_create(
+        (
+            Transaction(
+                wallet_id=wallet_id,
+                amount=net,
+                tx_type=CHECKPOINT,
+                description=description,
+            )
+            for wallet_id, net in nets.items()
+            if wallet_id not in existing
+        ),
+        batch_size=1000,
+    )
+    # auto_now_add stamped the new rows with now; a checkpoint opens the first
+    # hot month, so it is dated at the end of the archived one
+    created_ids = [checkpoint.pk for checkpoint in created]
+    for i in range(0, len(created_ids), ID_CHUNK_SIZE):
+        Transaction.objects.filter(
+            id__in=created_ids[i : i + ID_CHUNK_SIZE]
+        ).update(timestamp=end)
+
+
+def month_rows(wallet_id, month, tx_type=None):
+    """
+    Returns one wallet's archived rows for `month`, newest first, as the same
+    dicts transaction_page() yields. Returns None if the month is not archived.
+    """
+    archive = TransactionArchive.objects.filter(month=month).first()
+    if archive is None:
+        return None
+    segment = archive.segments.filter(wallet_id=wallet_id).first()
+    if segment is None:
+        return []
+
+    with open(archive_dir() / archive.path, "rb") as handle:
+        handle.seek(segment.offset)
+        member = handle.read(segment.length)
+
+    rows = []
+    for line in gzip.decompress(member).decode().splitlines():
+        data = json.loads(line)
+        if tx_type and data["tx_type"] != tx_type:
+            continue
+        rows.append(
+            {
+                "id": data["id"],
+                "timestamp": datetime.fromisoformat(data["timestamp"]),
+                "amount": Decimal(data["amount"]),
+                "tx_type": data["tx_type"],
+                "description": data["description"],
+            }
+        )
+    rows.reverse()
+    return rows
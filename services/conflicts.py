@@ -0,0 +1,102 @@
+# services/conflicts.py
+import heapq
+from collections import namedtuple
+
+from django.db.models import Q
+
+from .models import ClassSchedule
+
+Slot = namedtuple("Slot", "id start end code")
+Conflict = namedtuple("Conflict", "kind owner day first second")
+
+_COLUMNS = (
+    "id",
+    "course__faculty_id",
+    "course__faculty__name",
+    "room",
+    "day_of_week",
+    "start_time",
+    "end_time",
+    "course__code",
+)
+
+
+def _keys(row):
+    """The (kind, owner, day) timetables a schedule row belongs to."""
+    _, faculty_id, faculty_name, room, day, _, _, _ = row
+    keys = [("faculty", (faculty_id, faculty_name), day)]
+    if room:
+        keys.append(("room", room, day))
+    return keys
+
+
+def _slot(row):
+    return Slot(row[0], row[5], row[6], row[7])
+
+
+def check_slot(course, day, start, end, room="", exclude_id=None):
+    """
+    Returns the Conflicts a new (or edited) slot would create for the
+    course's faculty member and for the room. The overlap test runs in the
+    query itself, so only clashing rows come back.
+    """
+    owners = Q(course__faculty_id=course.faculty_id)
+    if room:
+        owners |= Q(room=room)
+    clashing = ClassSchedule.objects.filter(
+        owners, day_of_week=day, start_time__lt=end, end_time__gt=start
+    )
+    if exclude_id:
+        clashing = clashing.exclude(pk=exclude_id)
+
+    new = Slot(exclude_id, start, end, course.code)
+    faculty, rooms = [], []
+    for row in clashing.values_list(*_COLUMNS).order_by("start_time", "end_time"):
+        slot = _slot(row)
+        if row[1] == course.faculty_id:
+            faculty.append(Conflict("faculty", course.faculty.name, day, slot, new))
+        if room and row[3] == room:
+            rooms.append(Conflict("room", room, day, slot, new))
+    return faculty + rooms
+
+
+def audit_conflicts(rows=None):
+    """
+    Reports every overlapping pair across the whole timetable.
+
+    Rows are grouped per (faculty, day) and (room, day) and swept in start
+    order with a min-heap of end times: finished slots are popped, and
+    everything still on the heap overlaps the slot being visited. That is
+    O(n log n) plus one step per reported pair, instead of comparing every
+    pair of rows.
+    """
+    if rows is None:
+        rows = ClassSchedule.objects.values_list(*_COLUMNS).iterator(chunk_size=2000)
+
+    timetables = {}
+    for row in rows:
+        for key in _keys(row):
+            timetables.setdefault(key, []).append(_slot(row))
+
+    conflicts = []
+    for (kind, owner, day), slots in timetables.items():
+        if kind == "faculty":
+            owner = owner[1]
+        active = []
+        for slot in sorted(slots, key=lambda slot: (slot.start, slot.end)):
+            while active and active[0][0] <= slot.start:
+                heapq.heappop(active)
+            for _, _, running in active:
+                conflicts.append(Conflict(kind, owner, day, running, slot))
+            heapq.heappush(active, (slot.end, slot.id, slot))
+    return conflicts
+
+
+def describe(conflict):
+    first, second = conflict.first, conflict.second
+    who = "Room" if conflict.kind == "room" else "Faculty"
+    return (
+        f"{who} {conflict.owner} on {conflict.day}: {first.code} "
+        f"{first.start:%H:%M}-{first.end:%H:%M} overlaps {second.code} "
+        f"{second.start:%H:%M}-{second.end:%H:%M}"
+    )
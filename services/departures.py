@@ -0,0 +1,93 @@
+# services/departures.py
+import threading
+import time
+from bisect import bisect_right
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import BusSchedule
+
+# route_id -> {"name": str, "departures": [time, ...], "arrivals": [time, ...]}
+_routes = None
+_built_at = 0.0
+_index_lock = threading.Lock()
+
+
+def _index_ttl():
+    # Other worker processes only learn about edits through this refresh
+    return getattr(settings, "BUS_INDEX_TTL_SECONDS", 300)
+
+
+def rebuild_departure_index():
+    """Loads every schedule in one query into per-route sorted departure lists."""
+    global _routes, _built_at
+
+    routes = {}
+    rows = BusSchedule.objects.values_list(
+        "route_id", "route__route_name", "departure_time", "arrival_time"
+    ).order_by("route_id", "departure_time")
+    for route_id, route_name, departure, arrival in rows:
+        entry = routes.setdefault(
+            route_id, {"name": route_name, "departures": [], "arrivals": []}
+        )
+        entry["departures"].append(departure)
+        entry["arrivals"].append(arrival)
+
+    with _index_lock:
+        _routes = routes
+        _built_at = time.monotonic()
+    return routes
+
+
+# Per thread, because each thread commits through its own connection
+_pending = threading.local()
+
+
+def _rebuild_if_dirty():
+    if getattr(_pending, "dirty", False):
+        _pending.dirty = False
+        rebuild_departure_index()
+
+
+def queue_departure_rebuild():
+    """
+    Rebuilds the index after the current transaction commits. Every row a
+    queryset delete touches queues a callback, but only the first to run
+    rebuilds; the rest find the flag already cleared. A rolled-back
+    transaction leaves the flag set, which costs one spare rebuild later.
+    """
+    _pending.dirty = True
+    transaction.on_commit(_rebuild_if_dirty)
+
+
+def _current_index():
+    routes = _routes
+    if routes is None or time.monotonic() - _built_at > _index_ttl():
+        routes = rebuild_departure_index()
+    return routes
+
+
+def next_departures(route_id, after, k=3):
+    """
+    Returns up to k departures strictly after `after` (a datetime.time),
+    wrapping to the next day's first buses. None if the route has no schedule.
+    """
+    entry = _current_index().get(route_id)
+    if entry is None:
+        return None
+
+    departures = entry["departures"]
+    start = bisect_right(departures, after)
+    results = []
+    for offset in range(min(k, len(departures))):
+        position = start + offset
+        day_offset, position = divmod(position, len(departures))
+        results.append(
+            {
+                "departure": departures[position],
+                "arrival": entry["arrivals"][position],
+                "day_offset": day_offset,
+            }
+        )
+    return {"route_name": entry["name"], "departures": results}
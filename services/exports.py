@@ -0,0 +1,155 @@
+# services/exports.py
+import csv
+import json
+from datetime import date, datetime, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import MealBooking, StudentWallet, Transaction
+
+EXPORT_CHUNK_SIZE = 2000
+# Rows joined into one response chunk, so the server is not flushing per line
+LINES_PER_CHUNK = 500
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _transactions(start, end, kind):
+    rows = Transaction.objects.all()
+    if start:
+        rows = rows.filter(timestamp__gte=_day_start(start))
+    if end:
+        rows = rows.filter(timestamp__lt=_day_start(end + timedelta(days=1)))
+    if kind:
+        if kind not in dict(Transaction.TRANSACTION_TYPES):
+            raise ExportError(f"Unknown transaction type '{kind}'.")
+        rows = rows.filter(tx_type=kind)
+    return rows
+
+
+def _bookings(start, end, kind):
+    # Bookings that overlap the window, optionally only those including one meal
+    rows = MealBooking.objects.all()
+    if start:
+        rows = rows.filter(date_to__gte=start)
+    if end:
+        rows = rows.filter(date_from__lte=end)
+    if kind:
+        if kind not in ("breakfast", "lunch", "dinner"):
+            raise ExportError(f"Unknown meal '{kind}'.")
+        rows = rows.filter(**{kind: True})
+    return rows
+
+
+def _wallets(start, end, kind):
+    if kind:
+        raise ExportError("Wallet exports take no type filter.")
+    rows = StudentWallet.objects.all()
+    if start:
+        rows = rows.filter(last_updated__gte=_day_start(start))
+    if end:
+        rows = rows.filter(last_updated__lt=_day_start(end + timedelta(days=1)))
+    return rows
+
+
+# dataset -> (filtered queryset builder, projected columns)
+DATASETS = {
+    "transactions": (
+        _transactions,
+        (
+            "id",
+            "wallet_id",
+            "wallet__user__username",
+            "timestamp",
+            "tx_type",
+            "amount",
+            "description",
+        ),
+    ),
+    "bookings": (
+        _bookings,
+        (
+            "id",
+            "user__username",
+            "date_from",
+            "date_to",
+            "breakfast",
+            "lunch",
+            "dinner",
+            "created_at",
+        ),
+    ),
+    "wallets": (
+        _wallets,
+        ("id", "user__username", "balance", "last_updated"),
+    ),
+}
+
+
+def export_rows(dataset, start=None, end=None, kind=None):
+    """
+    Returns (header, rows) for a dataset. `rows` is a server-side cursor over a
+    values_list projection in id order, so memory stays flat however many
+    rows match.
+    """
+    try:
+        build, columns = DATASETS[dataset]
+    except KeyError:
+        raise ExportError(f"Unknown export '{dataset}'.")
+    rows = (
+        build(start, end, kind)
+        .order_by("id")
+        .values_list(*columns)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    header = [column.replace("__", "_") for column in columns]
+    return header, rows
+
+
+def _cell(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def _chunked(lines):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= LINES_PER_CHUNK:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_cell(value) for value in row])
+
+
+def ndjson_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def stream(header, rows, fmt):
+    lines = csv_lines if fmt == "csv" else ndjson_lines
+    return _chunked(lines(header, rows))
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
-from .models import MealBooking
+from .models import ClassSchedule, MealBooking
+from .conflicts import check_slot, describe
 
 
 class RegistrationForm(forms.ModelForm):
@@ -69,3 +70,53 @@ class MealBookingForm(forms.ModelForm):
             "lunch": forms.CheckboxInput(attrs={"class": "form-check-input"}),
             "dinner": forms.CheckboxInput(attrs={"class": "form-check-input"}),
         }
+
+
+class ClassScheduleForm(forms.ModelForm):
+    class Meta:
+        model = ClassSchedule
+        fields = ["course", "day_of_week", "start_time", "end_time", "room"]
+        widgets = {
+            "course": forms.Select(
+                attrs={"class": "form-select bg-black border-secondary text-white"}
+            ),
+            "day_of_week": forms.Select(
+                attrs={"class": "form-select bg-black border-secondary text-white"}
+            ),
+            "start_time": forms.TimeInput(
+                attrs={
+                    "type": "time",
+                    "class": "form-control bg-black border-secondary text-white",
+                }
+            ),
+            "end_time": forms.TimeInput(
+                attrs={
+                    "type": "time",
+                    "class": "form-control bg-black border-secondary text-white",
+                }
+            ),
+            "room": forms.TextInput(
+                attrs={
+                    "class": "form-control bg-black border-secondary text-white",
+                    "placeholder": "Room (optional)",
+                }
+            ),
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        course = cleaned_data.get("course")
+        day = cleaned_data.get("day_of_week")
+        start = cleaned_data.get("start_time")
+        end = cleaned_data.get("end_time")
+        if not (course and day and start and end):
+            return cleaned_data
+        if start >= end:
+            raise forms.ValidationError("The class must end after it starts.")
+
+        conflicts = check_slot(
+            course, day, start, end, cleaned_data.get("room", ""), self.instance.pk
+        )
+        if conflicts:
+            raise forms.ValidationError([describe(conflict) for conflict in conflicts])
+        return cleaned_data
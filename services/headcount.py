@@ -0,0 +1,90 @@
+# services/headcount.py
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import MealBooking, MealHeadcount
+
+MEALS = ("breakfast", "lunch", "dinner")
+
+
+def booking_ranges(booking):
+    """Returns (meal, date_from, date_to) for every meal a booking covers."""
+    if booking is None or booking.date_to < booking.date_from:
+        return []
+    return [
+        (meal, booking.date_from, booking.date_to)
+        for meal in MEALS
+        if getattr(booking, meal)
+    ]
+
+
+def range_segments(weighted_ranges):
+    """
+    Difference-array sweep over (start, end, weight) ranges. Returns
+    (start, end, delta) segments where the summed weight is constant and non-zero.
+    """
+    diff = defaultdict(int)
+    for start, end, weight in weighted_ranges:
+        diff[start] += weight
+        diff[end + timedelta(days=1)] -= weight
+
+    segments = []
+    running = 0
+    points = sorted(diff)
+    for point, next_point in zip(points, points[1:]):
+        running += diff[point]
+        if running:
+            segments.append((point, next_point - timedelta(days=1), running))
+    return segments
+
+
+def _days(start, end):
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def apply_booking_change(previous, current):
+    """Moves headcounts from a booking's previous state to its current one."""
+    weighted = defaultdict(list)
+    for meal, start, end in booking_ranges(previous):
+        weighted[meal].append((start, end, -1))
+    for meal, start, end in booking_ranges(current):
+        weighted[meal].append((start, end, 1))
+
+    with transaction.atomic():
+        for meal, ranges in weighted.items():
+            for start, end, delta in range_segments(ranges):
+                MealHeadcount.objects.bulk_create(
+                    [MealHeadcount(day=day, meal=meal) for day in _days(start, end)],
+                    ignore_conflicts=True,
+                )
+                MealHeadcount.objects.filter(
+                    meal=meal, day__range=(start, end)
+                ).update(count=F("count") + delta)
+
+
+def rebuild_headcounts():
+    """Recomputes the whole rollup with one sweep-line pass over all bookings."""
+    weighted = defaultdict(list)
+    bookings = MealBooking.objects.values_list(
+        "date_from", "date_to", *MEALS
+    ).iterator(chunk_size=2000)
+    for date_from, date_to, *flags in bookings:
+        if date_to < date_from:
+            continue
+        for meal, booked in zip(MEALS, flags):
+            if booked:
+                weighted[meal].append((date_from, date_to, 1))
+
+    rows = [
+        MealHeadcount(day=day, meal=meal, count=count)
+        for meal, ranges in weighted.items()
+        for start, end, count in range_segments(ranges)
+        for day in _days(start, end)
+    ]
+    with transaction.atomic():
+        MealHeadcount.objects.all().delete()
+        MealHeadcount.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,82 @@
+# services/history.py
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+
+from . import archive
+from .models import Transaction
+from .rollups import month_bounds
+
+HISTORY_PAGE_SIZE = 25
+HISTORY_MAX_PAGE_SIZE = 100
+TX_TYPES = ("Credit", "Debit")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, tx_id):
+    raw = f"{timestamp.isoformat()}|{tx_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, tx_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        timestamp, tx_id = datetime.fromisoformat(timestamp), int(tx_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e))
+    # Cursors we issue always carry an offset; a naive one cannot be compared
+    if timezone.is_naive(timestamp):
+        raise InvalidCursor("Cursor timestamp has no UTC offset")
+    return timestamp, tx_id
+
+
+def transaction_page(
+    wallet_id, cursor=None, tx_type=None, limit=HISTORY_PAGE_SIZE, month=None
+):
+    """
+    Returns (rows, next_cursor) for one page of a wallet's history, newest first.
+
+    Seeks past the (timestamp, id) of the previous page's last row instead of
+    using OFFSET, so every page is an index range scan of `limit` rows on
+    (wallet, timestamp, id) no matter how long the history is. With `month`,
+    only that month is listed, read from its segment file if it was archived.
+    """
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    tx_type = tx_type if tx_type in TX_TYPES else None
+    position = decode_cursor(cursor) if cursor else None
+
+    archived = archive.month_rows(wallet_id, month, tx_type) if month else None
+    if archived is not None:
+        if position:
+            archived = [
+                row for row in archived if (row["timestamp"], row["id"]) < position
+            ]
+        page = archived[: limit + 1]
+    else:
+        rows = Transaction.objects.filter(wallet_id=wallet_id)
+        if tx_type:
+            rows = rows.filter(tx_type=tx_type)
+        if month:
+            start, end = month_bounds(month)
+            rows = rows.filter(timestamp__gte=start, timestamp__lt=end)
+        if position:
+            timestamp, tx_id = position
+            rows = rows.filter(
+                Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=tx_id)
+            )
+        page = list(
+            rows.order_by("-timestamp", "-id").values(
+                "id", "timestamp", "amount", "tx_type", "description"
+            )[: limit + 1]
+        )
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1]["timestamp"], page[-1]["id"])
+    return page, next_cursor
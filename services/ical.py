@@ -0,0 +1,252 @@
+# services/ical.py
+import hashlib
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    BusRoute,
+    BusSchedule,
+    CalendarFeedVersion,
+    ClassSchedule,
+    Enrollment,
+    Event,
+)
+
+PRODID = "-//All-In-One University//Campus Calendar 1.0//EN"
+UID_DOMAIN = "all-in-one-university"
+WEEKDAYS = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+
+FEED_SALT = "services.ical.feed"
+
+
+def feed_token(user):
+    """The secret URL token for a user's feed; calendar apps cannot log in."""
+    return signing.Signer(salt=FEED_SALT).sign(str(user.pk))
+
+
+def user_id_for_token(token):
+    try:
+        return int(signing.Signer(salt=FEED_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def bump_feeds(keys):
+    """
+    Advances the change counter of every key, creating missing counters.
+    Runs in the caller's transaction, so a rolled-back edit bumps nothing.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    now = timezone.now()
+    with transaction.atomic():
+        CalendarFeedVersion.objects.bulk_create(
+            [CalendarFeedVersion(key=key, changed_at=now) for key in keys],
+            ignore_conflicts=True,
+        )
+        CalendarFeedVersion.objects.filter(key__in=keys).update(
+            counter=F("counter") + 1, changed_at=now
+        )
+
+
+def feed_keys(user_id):
+    """The counters one user's feed is built from."""
+    course_ids = Enrollment.objects.filter(user_id=user_id).values_list(
+        "course_id", flat=True
+    )
+    route_ids = BusRoute.objects.filter(subscribers=user_id).values_list(
+        "id", flat=True
+    )
+    return (
+        ["events", f"user:{user_id}"]
+        + sorted(f"course:{pk}" for pk in course_ids)
+        + sorted(f"route:{pk}" for pk in route_ids)
+    )
+
+
+def feed_version(user_id):
+    """
+    Returns (etag, last_modified) for a user's feed without building it.
+
+    The ETag hashes each key with its counter, so an edit, an enrollment or a
+    subscription change all produce a new tag. last_modified is the newest
+    change among those keys, or None if none has changed yet.
+    """
+    keys = feed_keys(user_id)
+    versions = {
+        key: (counter, changed_at)
+        for key, counter, changed_at in CalendarFeedVersion.objects.filter(
+            key__in=keys
+        ).values_list("key", "counter", "changed_at")
+    }
+    digest = hashlib.sha256(
+        f"{PRODID}|{settings.CALENDAR_TERM_START}|{settings.CALENDAR_TERM_WEEKS}".encode()
+    )
+    for key in keys:
+        digest.update(f"|{key}={versions.get(key, (0,))[0]}".encode())
+    changes = [changed_at for _, changed_at in versions.values()]
+    return digest.hexdigest()[:32], max(changes, default=None)
+
+
+def _text(value):
+    """Escapes a TEXT value (RFC 5545 3.3.11)."""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    """Splits lines longer than 75 octets (RFC 5545 3.1) without breaking a UTF-8 character."""
+    data = line.encode()
+    if len(data) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and data[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode())
+        start, limit = end, 74  # continuation lines start with a space
+    return "\r\n ".join(parts)
+
+
+def _local(moment):
+    # Floating times: classes and buses run on campus wall-clock time
+    return moment.strftime("%Y%m%dT%H%M%S")
+
+
+def _utc(moment):
+    return moment.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _first_on_or_after(start, day_name):
+    return start + timedelta(days=(WEEKDAYS.index(day_name) - start.weekday()) % 7)
+
+
+def build_feed(user_id, stamp=None):
+    """
+    Renders one user's calendar: enrolled classes as weekly recurrences,
+    subscribed bus departures as daily recurrences and every campus event.
+    DTSTAMP is the feed's last change, so unchanged data renders identically.
+    """
+    term_start = date.fromisoformat(settings.CALENDAR_TERM_START)
+    weeks = settings.CALENDAR_TERM_WEEKS
+    dtstamp = _utc(
+        stamp
+        or datetime.combine(term_start, datetime.min.time(), tzinfo=dt_timezone.utc)
+    )
+
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        "X-WR-CALNAME:Campus",
+    ]
+
+    def vevent(uid, start, end, summary, rrule=None, location="", description=""):
+        lines.extend(
+            [
+                "BEGIN:VEVENT",
+                f"UID:{uid}@{UID_DOMAIN}",
+                f"DTSTAMP:{dtstamp}",
+                f"DTSTART:{start}",
+            ]
+        )
+        if end:
+            lines.append(f"DTEND:{end}")
+        if rrule:
+            lines.append(f"RRULE:{rrule}")
+        lines.append(f"SUMMARY:{_text(summary)}")
+        if location:
+            lines.append(f"LOCATION:{_text(location)}")
+        if description:
+            lines.append(f"DESCRIPTION:{_text(description)}")
+        lines.append("END:VEVENT")
+
+    classes = (
+        ClassSchedule.objects.filter(course__enrollments__user_id=user_id)
+        .values_list(
+            "id",
+            "day_of_week",
+            "start_time",
+            "end_time",
+            "room",
+            "course__code",
+            "course__name",
+            "course__faculty__name",
+        )
+        .order_by("id")
+    )
+    for pk, day, start, end, room, code, name, faculty in classes:
+        first = _first_on_or_after(term_start, day)
+        vevent(
+            f"class-{pk}",
+            _local(datetime.combine(first, start)),
+            _local(datetime.combine(first, end)),
+            f"{code}: {name}",
+            rrule=f"FREQ=WEEKLY;COUNT={weeks}",
+            location=room,
+            description=faculty,
+        )
+
+    departures = (
+        BusSchedule.objects.filter(route__subscribers=user_id)
+        .values_list(
+            "id",
+            "departure_time",
+            "arrival_time",
+            "route__route_name",
+            "route__start_location",
+            "route__end_location",
+        )
+        .order_by("id")
+    )
+    for pk, departure, arrival, route, origin, destination in departures:
+        # A departure after its arrival time is an overnight trip
+        arrives = term_start + timedelta(days=int(arrival < departure))
+        vevent(
+            f"bus-{pk}",
+            _local(datetime.combine(term_start, departure)),
+            _local(datetime.combine(arrives, arrival)),
+            f"Bus: {route}",
+            rrule=f"FREQ=DAILY;COUNT={weeks * 7}",
+            location=origin,
+            description=f"{origin} to {destination}",
+        )
+
+    events = Event.objects.values_list(
+        "id", "event_name", "event_date", "description", "club__club_name"
+    ).order_by("id")
+    for pk, name, when, description, club in events:
+        vevent(
+            f"event-{pk}",
+            _utc(when),
+            None,
+            name,
+            description=f"{club}: {description}" if club else description,
+        )
+
+    lines.append("END:VCALENDAR")
+    return "".join(_fold(line) + "\r\n" for line in lines)
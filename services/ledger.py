@@ -0,0 +1,68 @@
+# services/ledger.py
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import StudentWallet, Transaction
+
+CREDIT = "Credit"
+DEBIT = "Debit"
+
+
+class LedgerError(Exception):
+    pass
+
+
+class InsufficientFunds(LedgerError):
+    pass
+
+
+def apply(wallet_id, amount, tx_type, idempotency_key=None, description=""):
+    """
+    Posts one Credit or Debit against a wallet and returns its Transaction.
+
+    The balance is changed with a single conditional UPDATE (balance >= amount
+    for debits), so concurrent payments never read-modify-write in Python and
+    only contend for the one wallet row they touch. Replaying an
+    idempotency_key returns the originally posted Transaction unchanged.
+    """
+    amount = Decimal(amount)
+    if amount <= 0:
+        raise LedgerError("Amount must be positive.")
+    if tx_type not in (CREDIT, DEBIT):
+        raise LedgerError(f"Unknown transaction type '{tx_type}'.")
+
+    try:
+        with transaction.atomic():
+            entry = Transaction.objects.create(
+                wallet_id=wallet_id,
+                amount=amount,
+                tx_type=tx_type,
+                description=description,
+                idempotency_key=idempotency_key,
+            )
+            wallets = StudentWallet.objects.filter(pk=wallet_id)
+            if tx_type == DEBIT:
+                wallets = wallets.filter(balance__gte=amount)
+                change = F("balance") - amount
+            else:
+                change = F("balance") + amount
+            if not wallets.update(balance=change, last_updated=timezone.now()):
+                # Rolls back the Transaction row inserted above
+                raise InsufficientFunds(f"Wallet {wallet_id} cannot cover {amount}.")
+    except IntegrityError:
+        existing = (
+            Transaction.objects.filter(idempotency_key=idempotency_key).first()
+            if idempotency_key
+            else None
+        )
+        if existing is None:
+            raise
+        return existing
+    return entry
+
+
+def balance(wallet_id):
+    return StudentWallet.objects.values_list("balance", flat=True).get(pk=wallet_id)
@@ -0,0 +1,80 @@
+# services/live.py
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+
+class LiveHub:
+    """
+    In-process pub/sub for Server-Sent Events. Each connected browser owns a
+    bounded asyncio.Queue; when a slow client falls behind, its oldest events
+    are dropped instead of growing memory.
+    """
+
+    def __init__(self, max_queue=None):
+        self.max_queue = max_queue or getattr(settings, "LIVE_QUEUE_SIZE", 32)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event, data):
+        """Safe to call from sync code (signal handlers run outside the event loop)."""
+        message = {"event": event, "data": data}
+        with self._lock:
+            targets = list(self._subscribers.items())
+        for queue, loop in targets:
+            if loop.is_closed():
+                self.unsubscribe(queue)
+                continue
+            loop.call_soon_threadsafe(self._offer, queue, message)
+
+    @staticmethod
+    def _offer(queue, message):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+
+hub = LiveHub()
+
+
+def live_updates_available(request):
+    """
+    The stream needs an ASGI server. Under WSGI (runserver, gunicorn) Django
+    would drain the endless generator into memory and pin a worker thread.
+    """
+    return isinstance(request, ASGIRequest)
+
+
+def format_sse(message):
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+async def event_stream(queue, keepalive):
+    """Yields SSE frames from a subscriber queue, with comment keep-alives."""
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(message)
+    finally:
+        hub.unsubscribe(queue)
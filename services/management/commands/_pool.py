@@ -0,0 +1,34 @@
+# Shared process-pool plumbing for the bulk management commands
+from django.db import connections
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+
+
+def _init_worker():
+    # Connections inherited from the parent must not be shared across processes
+    import django
+
+    django.setup()
+    connections.close_all()
+
+
+def run_tasks(func, tasks, workers):
+    """
+    Calls func(*task) for every task and yields results as they finish.
+    With workers <= 1 everything runs in-process (debugging, in-memory test DBs).
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield func(*task)
+        return
+
+    # Forked workers must open their own connections
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(),
+        initializer=_init_worker,
+    ) as pool:
+        futures = [pool.submit(func, *task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from services.archive import CHECKPOINT, ArchiveError, archive_month
+from services.models import Transaction
+from services.rollups import month_bounds
+from datetime import date, datetime
+import time
+
+
+class Command(BaseCommand):
+    help = "Moves Transaction rows older than the hot window into monthly segment files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            default=None,
+            help=(
+                "Archive every month before this one (YYYY-MM). Defaults to "
+                "keeping TRANSACTION_HOT_MONTHS months in the hot table."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        cutoff = self._parse_cutoff(options["before"])
+        cutoff_start, _ = month_bounds(cutoff)
+        months = sorted(
+            {
+                timezone.localtime(moment).date()
+                if isinstance(moment, datetime)
+                else moment
+                for moment in Transaction.objects.filter(timestamp__lt=cutoff_start)
+                .exclude(tx_type=CHECKPOINT)
+                .annotate(
+                    month=TruncMonth(
+                        "timestamp", tzinfo=timezone.get_current_timezone()
+                    )
+                )
+                .values_list("month", flat=True)
+                .distinct()
+            }
+        )
+
+        started = time.perf_counter()
+        total = 0
+        for month in months:
+            try:
+                archive = archive_month(month)
+            except ArchiveError as e:
+                raise CommandError(str(e))
+            total += archive.row_count
+            self.stdout.write(f"  {month:%Y-%m}: {archive.row_count} rows")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully archived {total} transactions from {len(months)} "
+                f"months before {cutoff:%B %Y} in {elapsed:.1f}s!"
+            )
+        )
+
+    def _parse_cutoff(self, value):
+        if value is None:
+            month = timezone.localdate().replace(day=1)
+            for _ in range(settings.TRANSACTION_HOT_MONTHS):
+                month = date.fromordinal(month.toordinal() - 1).replace(day=1)
+            return month
+        try:
+            return datetime.strptime(value, "%Y-%m").date()
+        except ValueError:
+            raise CommandError("--before must look like YYYY-MM.")
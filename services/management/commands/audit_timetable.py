@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from services.conflicts import audit_conflicts, describe
+from services.models import ClassSchedule
+import time
+
+
+class Command(BaseCommand):
+    help = "Reports every faculty and room double-booking in the class timetable"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        conflicts = audit_conflicts()
+        elapsed = time.perf_counter() - started
+
+        for conflict in conflicts:
+            self.stdout.write(f"  {describe(conflict)}")
+        summary = (
+            f"{ClassSchedule.objects.count()} slots audited in {elapsed:.2f}s, "
+            f"{len(conflicts)} overlaps"
+        )
+        if conflicts:
+            self.stderr.write(self.style.WARNING(f"Timetable has clashes: {summary}."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Successfully audited {summary}!"))
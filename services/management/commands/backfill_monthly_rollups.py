@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from services.rollups import rebuild_monthly_rollups
+import time
+
+
+class Command(BaseCommand):
+    help = "Rebuilds per-wallet monthly credit/debit rollups from the Transaction log"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_monthly_rollups()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully rebuilt {count} monthly summaries in {elapsed:.2f}s!"
+            )
+        )
@@ -0,0 +1,75 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from services import ledger
+from services.models import StudentWallet
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import time
+
+
+class Command(BaseCommand):
+    help = "Measures parallel ledger debits on one shared wallet and on separate wallets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument("--debits", type=int, default=2000)
+        parser.add_argument("--amount", default="1.00")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        debits = options["debits"]
+        amount = Decimal(options["amount"])
+
+        users = [
+            User.objects.create(username=f"__ledger_bench_{i}")
+            for i in range(workers)
+        ]
+        wallet_ids = list(
+            StudentWallet.objects.filter(user__in=users).values_list("id", flat=True)
+        )
+        opening = amount * debits
+        StudentWallet.objects.filter(id__in=wallet_ids).update(balance=opening)
+
+        try:
+            for label, targets in (
+                ("same wallet", [wallet_ids[0]] * debits),
+                ("different wallets", [wallet_ids[i % workers] for i in range(debits)]),
+            ):
+                StudentWallet.objects.filter(id__in=wallet_ids).update(balance=opening)
+                self._run(label, targets, amount, opening, workers)
+        finally:
+            User.objects.filter(id__in=[u.id for u in users]).delete()
+
+    def _run(self, label, targets, amount, opening, workers):
+        def debit_slice(wallet_ids):
+            ok = 0
+            try:
+                for wallet_id in wallet_ids:
+                    try:
+                        ledger.apply(
+                            wallet_id, amount, ledger.DEBIT, description="Benchmark"
+                        )
+                        ok += 1
+                    except (ledger.InsufficientFunds, OperationalError):
+                        pass
+            finally:
+                # Each worker thread owns its own database connection
+                connection.close()
+            return ok
+
+        slices = [targets[i::workers] for i in range(workers)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            ok = sum(pool.map(debit_slice, slices))
+        elapsed = time.perf_counter() - started
+
+        touched = set(targets)
+        expected = opening * len(touched) - amount * ok
+        actual = sum(ledger.balance(wallet_id) for wallet_id in touched)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{label}: {ok}/{len(targets)} debits in {elapsed:.2f}s "
+                f"({ok / elapsed:.0f}/s), lost updates: {expected - actual}"
+            )
+        )
@@ -0,0 +1,147 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.text import slugify
+from services import archive
+from services.models import StudentWallet, Transaction, WalletMonthlySummary
+from services.rollups import month_bounds
+from services.utils import generate_meal_pdf
+from services.management.commands._pool import run_tasks
+from datetime import date, datetime
+from itertools import groupby
+from pathlib import Path
+from types import SimpleNamespace
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+
+def _render_shard(wallets, month, out_dir):
+    """Renders one statement per wallet from a single ordered transaction stream."""
+    start, end = month_bounds(month)
+    wallet_ids = [wallet_id for wallet_id, _ in wallets]
+    usernames = dict(wallets)
+    totals = dict(
+        WalletMonthlySummary.objects.filter(
+            wallet_id__in=wallet_ids, month=month
+        ).values_list("wallet_id", "debit_total")
+    )
+    if archive.is_archived(month):
+        for wallet_id in wallet_ids:
+            rows = archive.month_rows(wallet_id, month, "Debit")
+            transactions = (SimpleNamespace(**row) for row in rows)
+            total = totals.get(wallet_id, 0)
+            _write(out_dir, wallet_id, usernames[wallet_id], transactions, total)
+        return len(wallet_ids)
+
+    rows = (
+        Transaction.objects.filter(
+            wallet_id__in=wallet_ids,
+            tx_type="Debit",
+            timestamp__gte=start,
+            timestamp__lt=end,
+        )
+        .order_by("wallet_id", "-timestamp", "-id")
+        .values_list("wallet_id", "timestamp", "description", "amount", named=True)
+        .iterator(chunk_size=2000)
+    )
+
+    rendered = set()
+    for wallet_id, transactions in groupby(rows, key=lambda row: row.wallet_id):
+        total = totals.get(wallet_id, 0)
+        _write(out_dir, wallet_id, usernames[wallet_id], transactions, total)
+        rendered.add(wallet_id)
+    # Students with no debits this month still get an (empty) statement
+    for wallet_id in wallet_ids:
+        if wallet_id not in rendered:
+            total = totals.get(wallet_id, 0)
+            _write(out_dir, wallet_id, usernames[wallet_id], [], total)
+
+    return len(wallet_ids)
+
+
+def _write(out_dir, wallet_id, username, transactions, total_spent):
+    # Keyed by wallet id; the slug is only a readable hint and never a path part
+    name = "_".join(filter(None, ["Meal_Summary", str(wallet_id), slugify(username)]))
+    path = Path(out_dir) / f"{name}.pdf"
+    with open(path, "wb") as handle:
+        user = SimpleNamespace(username=username)
+        generate_meal_pdf(user, transactions, total_spent, output=handle)
+
+
+class Command(BaseCommand):
+    help = "Exports every student's monthly meal statement using a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--month",
+            default=None,
+            help="Month to export as YYYY-MM. Defaults to the previous month.",
+        )
+        parser.add_argument(
+            "--output",
+            required=True,
+            help="Target directory, or a path ending in .zip for a single archive.",
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--shard-size",
+            type=int,
+            default=250,
+            help="Wallets rendered per worker task (default: 250).",
+        )
+
+    def handle(self, *args, **options):
+        month = self._parse_month(options["month"])
+        output = Path(options["output"])
+        as_zip = output.suffix.lower() == ".zip"
+        out_dir = Path(tempfile.mkdtemp()) if as_zip else output
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        wallets = list(
+            StudentWallet.objects.order_by("id").values_list("id", "user__username")
+        )
+        shard_size = max(1, options["shard_size"])
+        shards = [
+            wallets[i : i + shard_size] for i in range(0, len(wallets), shard_size)
+        ]
+
+        started = time.perf_counter()
+        done = 0
+        try:
+            tasks = [(shard, month, str(out_dir)) for shard in shards]
+            for count in run_tasks(_render_shard, tasks, options["workers"]):
+                done += count
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"  {done}/{len(wallets)} statements ({done / elapsed:.0f}/s)"
+                )
+
+            if as_zip:
+                output.parent.mkdir(parents=True, exist_ok=True)
+                # PDFs are already compressed, so store them as-is
+                with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as archive:
+                    for pdf in sorted(out_dir.iterdir()):
+                        archive.write(pdf, pdf.name)
+        finally:
+            if as_zip:
+                shutil.rmtree(out_dir, ignore_errors=True)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully exported {done} statements for {month:%B %Y} "
+                f"to {output} in {elapsed:.1f}s ({done / max(elapsed, 1e-9):.0f}/s)!"
+            )
+        )
+
+    def _parse_month(self, value):
+        if value is None:
+            first_of_this_month = timezone.localdate().replace(day=1)
+            previous = first_of_this_month.toordinal() - 1
+            return date.fromordinal(previous).replace(day=1)
+        try:
+            return datetime.strptime(value, "%Y-%m").date()
+        except ValueError:
+            raise CommandError("--month must look like YYYY-MM.")
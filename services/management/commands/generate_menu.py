@@ -1,56 +1,103 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from services.models import CafeteriaMenu
 from datetime import date, timedelta
 import random
+import time
+
+# Professional meal options for the rotation
+MEAL_ROTATION = {
+    "Breakfast": [
+        ("Oatmeal with Fruits & Coffee", 60),
+        ("Egg Sandwich & Juice", 50),
+        ("Pancakes with Syrup", 70),
+    ],
+    "Lunch": [
+        ("Chicken Biryani with Salad", 150),
+        ("Beef Tehari", 160),
+        ("Fish Curry with Rice & Lentils", 120),
+    ],
+    "Dinner": [
+        ("Grilled Fish and Steamed Veggies", 180),
+        ("Pasta Carbonara", 140),
+        ("Chicken Stir-fry", 130),
+    ],
+    "Snacks": [
+        ("Vegetable Pakora", 30),
+        ("Chicken Patties", 40),
+        ("Fruit Bowl", 50),
+    ],
+}
 
 
 class Command(BaseCommand):
     help = "Generates a monthly cafeteria menu automatically"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            default=None,
+            help="First day to generate (YYYY-MM-DD). Defaults to today.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Number of consecutive days to generate (default: 30).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Random seed so the same rotation can be reproduced.",
+        )
+        parser.add_argument(
+            "--keep-existing",
+            action="store_true",
+            help="Leave already scheduled meals untouched instead of overwriting them.",
+        )
+
     def handle(self, *args, **options):
-        # Professional meal options for the rotation
-        meals = {
-            "Breakfast": [
-                ("Oatmeal with Fruits & Coffee", 60),
-                ("Egg Sandwich & Juice", 50),
-                ("Pancakes with Syrup", 70),
-            ],
-            "Lunch": [
-                ("Chicken Biryani with Salad", 150),
-                ("Beef Tehari", 160),
-                ("Fish Curry with Rice & Lentils", 120),
-            ],
-            "Dinner": [
-                ("Grilled Fish and Steamed Veggies", 180),
-                ("Pasta Carbonara", 140),
-                ("Chicken Stir-fry", 130),
-            ],
-            "Snacks": [
-                ("Vegetable Pakora", 30),
-                ("Chicken Patties", 40),
-                ("Fruit Bowl", 50),
-            ],
-        }
-
-        start_date = date.today()
-        count = 0
-
-        # Generate for the next 30 days
-        for i in range(30):
-            current_day = start_date + timedelta(days=i)
-            for meal_type, options_list in meals.items():
-                desc, price = random.choice(options_list)
+        start_date = options["start"] or date.today()
+        days = options["days"]
+        if days < 1:
+            raise CommandError("--days must be at least 1.")
 
-                _, created = CafeteriaMenu.objects.get_or_create(
-                    day=current_day,
-                    meal_type=meal_type,
-                    defaults={"description": desc, "price": price},
+        rng = random.Random(options["seed"])
+        menus = []
+        for i in range(days):
+            current_day = start_date + timedelta(days=i)
+            for meal_type, options_list in MEAL_ROTATION.items():
+                desc, price = rng.choice(options_list)
+                menus.append(
+                    CafeteriaMenu(
+                        day=current_day,
+                        meal_type=meal_type,
+                        description=desc,
+                        price=price,
+                    )
                 )
-                if created:
-                    count += 1
 
+        # One upsert pass keyed on the (day, meal_type) unique constraint
+        if options["keep_existing"]:
+            conflict_options = {"ignore_conflicts": True}
+        else:
+            conflict_options = {
+                "update_conflicts": True,
+                "unique_fields": ["day", "meal_type"],
+                "update_fields": ["description", "price"],
+            }
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            CafeteriaMenu.objects.bulk_create(menus, **conflict_options)
+        elapsed = time.perf_counter() - started
+
+        end_date = start_date + timedelta(days=days - 1)
         self.stdout.write(
             self.style.SUCCESS(
-                f"Successfully generated {count} menu items for the month!"
+                f"Successfully generated {len(menus)} menu items "
+                f"({start_date} to {end_date}) in {elapsed:.3f}s!"
             )
         )
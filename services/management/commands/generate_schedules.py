@@ -1,33 +1,56 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from services.models import BusRoute, BusSchedule
+from services.ical import bump_feeds
+from services.notifications import send_schedule_digest
 from datetime import time
 
+# Bangladesh Standard University Shifts
+SLOTS = [
+    (time(7, 30), time(8, 15)),  # Early Morning
+    (time(8, 30), time(9, 15)),  # Morning
+    (time(14, 0), time(14, 45)),  # Afternoon Return
+    (time(16, 30), time(17, 15)),  # Evening Return
+]
+
 
 class Command(BaseCommand):
     help = "Generates a full week of bus schedules automatically"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--no-notify",
+            action="store_true",
+            help="Skip the summary email to route subscribers.",
+        )
+
     def handle(self, *args, **options):
-        # Retrieve all existing routes from the database
-        routes = BusRoute.objects.all()
-
-        # Bangladesh Standard University Shifts
-        slots = [
-            (time(7, 30), time(8, 15)),  # Early Morning
-            (time(8, 30), time(9, 15)),  # Morning
-            (time(14, 0), time(14, 45)),  # Afternoon Return
-            (time(16, 30), time(17, 15)),  # Evening Return
-        ]
-
-        count = 0
-        for route in routes:  # We use 'route' here
-            for dep, arr in slots:
-                # Fixed: Changed 'row' to 'route' to match the loop
-                _, created = BusSchedule.objects.get_or_create(
-                    route=route, departure_time=dep, arrival_time=arr
+        route_ids = list(BusRoute.objects.values_list("id", flat=True))
+
+        with transaction.atomic():
+            # One query for every slot that already exists, so reruns are no-ops
+            existing = set(
+                BusSchedule.objects.filter(route_id__in=route_ids).values_list(
+                    "route_id", "departure_time", "arrival_time"
                 )
-                if created:
-                    count += 1
+            )
+            missing = [
+                BusSchedule(route_id=route_id, departure_time=dep, arrival_time=arr)
+                for route_id in route_ids
+                for dep, arr in SLOTS
+                if (route_id, dep, arr) not in existing
+            ]
+            # bulk_create skips post_save, so no per-row notifications fire
+            created = BusSchedule.objects.bulk_create(missing)
+            bump_feeds({f"route:{schedule.route_id}" for schedule in created})
+
+        sent = 0
+        if created and not options["no_notify"]:
+            sent = send_schedule_digest([schedule.pk for schedule in created])
 
         self.stdout.write(
-            self.style.SUCCESS(f"Successfully created {count} new schedules!")
+            self.style.SUCCESS(
+                f"Successfully created {len(created)} new schedules! "
+                f"({sent} summary emails sent)"
+            )
         )
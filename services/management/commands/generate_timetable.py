@@ -0,0 +1,182 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from services.conflicts import audit_conflicts
+from services.ical import bump_feeds
+from services.models import ClassSchedule, Course
+from services.scheduling import Session, TimetableSolver, period_grid
+from services.timetable import expire_timetables
+from collections import Counter
+from datetime import time
+import time as clock
+
+# Bangladesh universities teach Sunday to Thursday
+TEACHING_DAYS = "Sunday,Monday,Tuesday,Wednesday,Thursday"
+
+
+class Command(BaseCommand):
+    help = "Assigns courses to weekly class slots and rooms with a heuristic solver"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sessions",
+            type=int,
+            default=2,
+            help="Weekly sessions per course (default: 2).",
+        )
+        parser.add_argument("--minutes", type=int, default=90, help="Session length.")
+        parser.add_argument("--gap", type=int, default=10, help="Break between slots.")
+        parser.add_argument("--day-start", type=time.fromisoformat, default=time(8, 0))
+        parser.add_argument("--day-end", type=time.fromisoformat, default=time(17, 0))
+        parser.add_argument("--days", default=TEACHING_DAYS)
+        parser.add_argument(
+            "--rooms",
+            default=None,
+            help="Comma-separated rooms. Defaults to the rooms already in use.",
+        )
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Delete every existing class slot and schedule all courses afresh.",
+        )
+        parser.add_argument(
+            "--allow-clashes",
+            action="store_true",
+            help=(
+                "Write the timetable even if some sessions still double-book a "
+                "lecturer or room. By default nothing is written then."
+            ),
+        )
+        parser.add_argument("--iterations", type=int, default=20000)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solve and print statistics without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        days = [day.strip() for day in options["days"].split(",") if day.strip()]
+        unknown = set(days) - {day for day, _ in ClassSchedule.DAYS}
+        if unknown:
+            raise CommandError(f"Unknown days: {', '.join(sorted(unknown))}")
+        periods = period_grid(
+            days,
+            options["day_start"],
+            options["day_end"],
+            options["minutes"],
+            options["gap"],
+        )
+        if not periods:
+            raise CommandError("No session fits between --day-start and --day-end.")
+
+        # Rows that stay put block their faculty member and room
+        existing = ClassSchedule.objects.all()
+        if options["replace"]:
+            existing = existing.none()
+        fixed = list(
+            existing.values_list(
+                "course__faculty_id", "room", "day_of_week", "start_time", "end_time"
+            )
+        )
+        if options["rooms"]:
+            rooms = [room.strip() for room in options["rooms"].split(",")]
+            rooms = [room for room in rooms if room]
+        else:
+            rooms = sorted(
+                ClassSchedule.objects.exclude(room="")
+                .values_list("room", flat=True)
+                .distinct()
+            )
+        if not rooms:
+            raise CommandError("No rooms known yet; pass --rooms.")
+
+        scheduled = set(existing.values_list("course_id", flat=True))
+        courses = list(
+            Course.objects.exclude(id__in=scheduled)
+            .order_by("id")
+            .values_list("id", "faculty_id")
+        )
+        sessions = [
+            Session(course_id, faculty_id)
+            for course_id, faculty_id in courses
+            for _ in range(options["sessions"])
+        ]
+
+        blocked_faculty, blocked_rooms = set(), set()
+        for faculty_id, room, day, start, end in fixed:
+            for index, (p_day, p_start, p_end) in enumerate(periods):
+                if p_day == day and p_start < end and start < p_end:
+                    blocked_faculty.add((faculty_id, index))
+                    if room:
+                        blocked_rooms.add((room, index))
+
+        # Sessions beyond a lecturer's free periods must clash whatever the solver does
+        load = Counter(session.faculty_id for session in sessions)
+        blocked = Counter(faculty_id for faculty_id, _ in blocked_faculty)
+        overbooked = sum(
+            max(0, count - (len(periods) - blocked[faculty_id]))
+            for faculty_id, count in load.items()
+        )
+
+        solver = TimetableSolver(
+            sessions,
+            periods,
+            rooms,
+            blocked_faculty,
+            blocked_rooms,
+            seed=options["seed"],
+        )
+        placement, stats = solver.solve(options["iterations"])
+        self.stdout.write(
+            f"  {stats.sessions} sessions, {len(periods)} periods, {len(rooms)} rooms\n"
+            f"  greedy: {stats.greedy_conflicts} clashing sessions\n"
+            f"  local search: {stats.iterations} iterations, {stats.moves} moves, "
+            f"{stats.conflicts} clashing sessions left "
+            f"({overbooked} unavoidable: faculty over capacity)\n"
+            f"  solver time: {stats.seconds:.2f}s"
+        )
+        if stats.conflicts:
+            course_ids = {sessions[i].course_id for i in solver.clashing_sessions()}
+            clashing = Course.objects.filter(id__in=course_ids).order_by("code")
+            self.stderr.write(
+                "  clashing courses: "
+                + ", ".join(clashing.values_list("code", flat=True))
+            )
+            if not (options["allow_clashes"] or options["dry_run"]):
+                raise CommandError(
+                    f"{stats.conflicts} sessions still clash, so nothing was written. "
+                    "Add rooms or days, lighten the overloaded lecturers, or pass "
+                    "--allow-clashes."
+                )
+        if options["dry_run"]:
+            return
+
+        started = clock.perf_counter()
+        rows = [
+            ClassSchedule(
+                course_id=session.course_id,
+                day_of_week=periods[period][0],
+                start_time=periods[period][1],
+                end_time=periods[period][2],
+                room=room,
+            )
+            for session, (period, room) in zip(sessions, placement)
+        ]
+        with transaction.atomic():
+            if options["replace"]:
+                ClassSchedule.objects.all().delete()
+            # bulk_create skips post_save, so expire timetables and feeds here
+            created = ClassSchedule.objects.bulk_create(rows, batch_size=1000)
+            course_ids = {row.course_id for row in rows}
+            expire_timetables(course_ids=course_ids)
+            bump_feeds(f"course:{pk}" for pk in course_ids)
+        overlaps = len(audit_conflicts())
+        elapsed = stats.seconds + clock.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully scheduled {len(created)} class sessions for "
+                f"{len(courses)} courses in {elapsed:.1f}s "
+                f"({overlaps} overlaps in the audited timetable)!"
+            )
+        )
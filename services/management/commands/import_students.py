@@ -0,0 +1,165 @@
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from services.models import (
+    SIGNUP_BONUS,
+    Profile,
+    StudentWallet,
+    Transaction,
+    WalletMonthlySummary,
+)
+from services.rollups import month_start
+from services.management.commands._pool import run_tasks
+from datetime import date
+import csv
+import os
+import time
+
+REQUIRED_COLUMNS = {"username", "email", "password"}
+
+
+def _hash_passwords(index, passwords):
+    # Hashing is CPU-bound by design, so it is spread over worker processes
+    return index, [make_password(password) for password in passwords]
+
+
+class Command(BaseCommand):
+    help = "Bulk-creates students, wallets, signup credits and profiles from a CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "csv_path",
+            help=(
+                "CSV with username, email and password columns; first_name, "
+                "last_name, phone_number, date_of_birth and blood_group are optional."
+            ),
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Students inserted per transaction (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        students, skipped = self._read(options["csv_path"])
+        if not students:
+            self.stdout.write(f"Nothing to import ({skipped} rows skipped).")
+            return
+
+        # One hashing task per worker-sized slice, reassembled in CSV order
+        workers = max(1, options["workers"])
+        slice_size = max(1, -(-len(students) // (workers * 4)))
+        tasks = [
+            (i, [row["password"] for row in students[i : i + slice_size]])
+            for i in range(0, len(students), slice_size)
+        ]
+        hashes = [None] * len(students)
+        for index, chunk in run_tasks(_hash_passwords, tasks, workers):
+            hashes[index : index + len(chunk)] = chunk
+        hashed_at = time.perf_counter()
+
+        batch_size = max(1, options["batch_size"])
+        for i in range(0, len(students), batch_size):
+            self._insert(students[i : i + batch_size], hashes[i : i + batch_size])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully imported {len(students)} students in {elapsed:.1f}s "
+                f"({len(students) / max(elapsed, 1e-9):.0f} rows/s; hashing "
+                f"{hashed_at - started:.1f}s), {skipped} rows skipped!"
+            )
+        )
+
+    def _read(self, path):
+        try:
+            handle = open(path, newline="", encoding="utf-8-sig")
+        except OSError as e:
+            raise CommandError(str(e))
+        with handle:
+            reader = csv.DictReader(handle)
+            missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+            rows = [
+                {key: (value or "").strip() for key, value in row.items() if key}
+                for row in reader
+            ]
+
+        usernames = {row["username"] for row in rows}
+        taken = set(
+            User.objects.filter(username__in=usernames).values_list(
+                "username", flat=True
+            )
+        )
+        students, skipped = [], 0
+        for line, row in enumerate(rows, start=2):
+            username = row["username"]
+            if not username or not row["password"] or username in taken:
+                skipped += 1
+                self.stderr.write(f"  line {line}: skipped '{username}'")
+                continue
+            try:
+                row["date_of_birth"] = (
+                    date.fromisoformat(row["date_of_birth"])
+                    if row.get("date_of_birth")
+                    else None
+                )
+            except ValueError:
+                raise CommandError(f"line {line}: bad date_of_birth")
+            taken.add(username)
+            students.append(row)
+        return students, skipped
+
+    def _insert(self, students, hashes):
+        # bulk_create never sends post_save, so create_user_wallet stays quiet
+        # and every table below is written once per batch instead of per row
+        now = timezone.now()
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                User(
+                    username=row["username"],
+                    email=row["email"],
+                    password=password,
+                    first_name=row.get("first_name", ""),
+                    last_name=row.get("last_name", ""),
+                    date_joined=now,
+                )
+                for row, password in zip(students, hashes)
+            )
+            wallets = StudentWallet.objects.bulk_create(
+                StudentWallet(user=user, balance=SIGNUP_BONUS) for user in users
+            )
+            Transaction.objects.bulk_create(
+                Transaction(
+                    wallet=wallet,
+                    amount=SIGNUP_BONUS,
+                    tx_type="Credit",
+                    description="Initial Signup Bonus",
+                )
+                for wallet in wallets
+            )
+            # roll_up_transaction is skipped too, so seed the month's rollup here
+            WalletMonthlySummary.objects.bulk_create(
+                WalletMonthlySummary(
+                    wallet=wallet,
+                    month=month_start(now),
+                    credit_total=SIGNUP_BONUS,
+                    credit_count=1,
+                )
+                for wallet in wallets
+            )
+            Profile.objects.bulk_create(
+                Profile(
+                    user=user,
+                    phone_number=row.get("phone_number", "")[:15],
+                    date_of_birth=row["date_of_birth"],
+                    blood_group=row.get("blood_group", "")[:5],
+                )
+                for user, row in zip(users, students)
+            )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from services.payments import process_pending_callbacks
+from services.sms import flush_sms
+import time
+
+
+class Command(BaseCommand):
+    help = "Validates queued payment callbacks and credits wallets in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the inbox instead of exiting once it is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep between polls when the inbox is empty.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                processed = process_pending_callbacks(batch_size=options["batch_size"])
+                total += processed
+                if processed:
+                    continue
+                if not options["loop"]:
+                    break
+                # The inbox is drained; send this pass's alerts before idling
+                flush_sms()
+                time.sleep(options["interval"])
+        finally:
+            # Coalesced alerts wait on a daemon timer that dies with the process
+            flush_sms()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully processed {total} payment callbacks!")
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from services.headcount import rebuild_headcounts
+import time
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the daily meal headcount rollup from all meal bookings"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_headcounts()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully rebuilt {count} headcount rows in {elapsed:.2f}s!"
+            )
+        )
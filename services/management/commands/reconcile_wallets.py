@@ -0,0 +1,150 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Max, Min, Sum, Value, When
+from services.models import StudentWallet, Transaction
+from services.management.commands._pool import run_tasks
+from decimal import Decimal
+import csv
+import os
+import time
+
+CENTS = Decimal("0.01")
+RECHECK_BATCH_SIZE = 500
+REPORT_COLUMNS = ["wallet_id", "username", "balance", "ledger_total", "difference"]
+
+
+def _ledger_totals(transactions):
+    """Credits minus debits, plus any checkpoint, per wallet_id over a queryset."""
+    signed = Case(
+        When(tx_type="Credit", then=F("amount")),
+        When(tx_type="Debit", then=-F("amount")),
+        # Signed balance of the rows moved out by archive_transactions
+        When(tx_type="Checkpoint", then=F("amount")),
+        default=Value(0),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    rows = (
+        transactions.values("wallet_id")
+        .annotate(total=Sum(signed))
+        .order_by()
+        .values_list("wallet_id", "total")
+    )
+    # SQLite sums decimals as floats, so round back to whole cents
+    return {wallet_id: Decimal(total).quantize(CENTS) for wallet_id, total in rows}
+
+
+def _reconcile_range(low, high):
+    """
+    Compares stored balances with the ledger for wallet ids in [low, high).
+    Returns (wallets checked, [(wallet_id, balance, ledger_total), ...]).
+
+    Two plain grouped reads per range: no locks are taken, and only the
+    mismatches travel back to the parent process.
+    """
+    totals = _ledger_totals(
+        Transaction.objects.filter(wallet_id__gte=low, wallet_id__lt=high)
+    )
+    balances = StudentWallet.objects.filter(id__gte=low, id__lt=high).values_list(
+        "id", "balance"
+    )
+    checked = 0
+    mismatches = []
+    for wallet_id, balance in balances.iterator(chunk_size=2000):
+        checked += 1
+        total = totals.get(wallet_id, Decimal("0.00"))
+        if balance != total:
+            mismatches.append((wallet_id, balance, total))
+    return checked, mismatches
+
+
+def _recheck(wallet_ids):
+    """
+    Re-reads a batch of suspect wallets with their rows locked, so a payment
+    that landed between the two unlocked reads is not reported.
+    """
+    with transaction.atomic():
+        balances = list(
+            StudentWallet.objects.select_for_update()
+            .filter(id__in=wallet_ids)
+            .order_by("id")
+            .values_list("id", "balance")
+        )
+        totals = _ledger_totals(Transaction.objects.filter(wallet_id__in=wallet_ids))
+    return [
+        (wallet_id, balance, totals.get(wallet_id, Decimal("0.00")))
+        for wallet_id, balance in balances
+        if balance != totals.get(wallet_id, Decimal("0.00"))
+    ]
+
+
+class Command(BaseCommand):
+    help = "Checks every wallet balance against the sum of its transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--report",
+            default=None,
+            help="CSV file for the mismatch report. Defaults to stdout.",
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Wallet id range summed per worker task (default: 5000).",
+        )
+
+    def handle(self, *args, **options):
+        bounds = StudentWallet.objects.aggregate(low=Min("id"), high=Max("id"))
+        chunk = max(1, options["chunk_size"])
+        tasks = []
+        if bounds["low"] is not None:
+            tasks = [
+                (low, low + chunk)
+                for low in range(bounds["low"], bounds["high"] + 1, chunk)
+            ]
+
+        started = time.perf_counter()
+        checked = 0
+        suspects = []
+        results = run_tasks(_reconcile_range, tasks, options["workers"])
+        for count, mismatches in results:
+            checked += count
+            suspects += mismatches
+
+        suspect_ids = sorted(wallet_id for wallet_id, _, _ in suspects)
+        confirmed = []
+        for i in range(0, len(suspect_ids), RECHECK_BATCH_SIZE):
+            confirmed += _recheck(suspect_ids[i : i + RECHECK_BATCH_SIZE])
+        elapsed = time.perf_counter() - started
+
+        self._write_report(confirmed, options["report"])
+        summary = (
+            f"{checked} wallets checked in {elapsed:.2f}s "
+            f"({checked / max(elapsed, 1e-9):.0f}/s), {len(confirmed)} mismatched"
+        )
+        if confirmed:
+            self.stderr.write(
+                self.style.WARNING(f"Reconciliation found problems: {summary}.")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Successfully reconciled {summary}!")
+            )
+
+    def _write_report(self, mismatches, path):
+        usernames = dict(
+            StudentWallet.objects.filter(
+                id__in=[wallet_id for wallet_id, _, _ in mismatches]
+            ).values_list("id", "user__username")
+        )
+        handle = open(path, "w", newline="") if path else self.stdout
+        try:
+            writer = csv.writer(handle)
+            writer.writerow(REPORT_COLUMNS)
+            for wallet_id, balance, total in mismatches:
+                username = usernames.get(wallet_id, "")
+                writer.writerow([wallet_id, username, balance, total, balance - total])
+        finally:
+            if path:
+                handle.close()
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0008_profile_blood_group_profile_date_of_birth'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cafeteriamenu',
+            index=models.Index(fields=['day', 'meal_type'], name='cafeteria_day_meal_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:16
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_menus(apps, schema_editor):
+    """Keeps the oldest row for every (day, meal_type) so the constraint can be added."""
+    CafeteriaMenu = apps.get_model("services", "CafeteriaMenu")
+    keep_ids = (
+        CafeteriaMenu.objects.values("day", "meal_type")
+        .annotate(keep_id=Min("id"))
+        .values_list("keep_id", flat=True)
+    )
+    CafeteriaMenu.objects.exclude(id__in=list(keep_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0009_cafeteriamenu_day_meal_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_menus, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='cafeteriamenu',
+            name='cafeteria_day_meal_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='cafeteriamenu',
+            constraint=models.UniqueConstraint(fields=('day', 'meal_type'), name='unique_cafeteria_day_meal'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0010_cafeteriamenu_unique_day_meal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='busroute',
+            name='subscribers',
+            field=models.ManyToManyField(blank=True, related_name='bus_subscriptions', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:18
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_schedules(apps, schema_editor):
+    """Keeps the oldest row for every (route, departure, arrival) slot."""
+    BusSchedule = apps.get_model("services", "BusSchedule")
+    keep_ids = (
+        BusSchedule.objects.values("route", "departure_time", "arrival_time")
+        .annotate(keep_id=Min("id"))
+        .values_list("keep_id", flat=True)
+    )
+    BusSchedule.objects.exclude(id__in=list(keep_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0011_busroute_subscribers'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_schedules, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='busschedule',
+            constraint=models.UniqueConstraint(fields=('route', 'departure_time', 'arrival_time'), name='unique_bus_schedule_slot'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:20
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations, models
+
+MEALS = ("breakfast", "lunch", "dinner")
+
+
+def count_existing_bookings(apps, schema_editor):
+    """Seeds the rollup from bookings made before it existed (a difference-array sweep per meal)."""
+    MealBooking = apps.get_model("services", "MealBooking")
+    MealHeadcount = apps.get_model("services", "MealHeadcount")
+
+    diffs = {meal: defaultdict(int) for meal in MEALS}
+    bookings = MealBooking.objects.values_list("date_from", "date_to", *MEALS)
+    for date_from, date_to, *flags in bookings.iterator(chunk_size=2000):
+        if date_to < date_from:
+            continue
+        for meal, booked in zip(MEALS, flags):
+            if booked:
+                diffs[meal][date_from] += 1
+                diffs[meal][date_to + timedelta(days=1)] -= 1
+
+    rows = []
+    for meal, diff in diffs.items():
+        running = 0
+        points = sorted(diff)
+        for point, next_point in zip(points, points[1:]):
+            running += diff[point]
+            day = point
+            while running and day < next_point:
+                rows.append(MealHeadcount(day=day, meal=meal, count=running))
+                day += timedelta(days=1)
+    MealHeadcount.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0012_busschedule_unique_slot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealHeadcount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('meal', models.CharField(choices=[('breakfast', 'Breakfast'), ('lunch', 'Lunch'), ('dinner', 'Dinner')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day', 'meal'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'meal'), name='unique_headcount_day_meal')],
+            },
+        ),
+        migrations.RunPython(count_existing_bookings, migrations.RunPython.noop),
+    ]
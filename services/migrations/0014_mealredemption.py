@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0013_mealheadcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealRedemption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('meal', models.CharField(choices=[('breakfast', 'Breakfast'), ('lunch', 'Lunch'), ('dinner', 'Dinner')], max_length=10)),
+                ('station', models.CharField(blank=True, max_length=50)),
+                ('redeemed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='redemptions', to='services.mealbooking')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('booking', 'day', 'meal'), name='unique_redemption_per_meal')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0016_paymentcallback'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['wallet', '-timestamp', '-id'], name='transaction_history_idx'),
+        ),
+    ]
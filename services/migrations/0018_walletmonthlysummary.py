@@ -0,0 +1,67 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:28
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def summarize_existing_transactions(apps, schema_editor):
+    """Rolls up the ledger written before summaries existed, one grouped aggregate."""
+    Transaction = apps.get_model("services", "Transaction")
+    WalletMonthlySummary = apps.get_model("services", "WalletMonthlySummary")
+
+    grouped = (
+        Transaction.objects.annotate(
+            month=TruncMonth("timestamp", tzinfo=timezone.get_current_timezone())
+        )
+        .values("wallet_id", "month", "tx_type")
+        .annotate(total=Sum("amount"), entries=Count("id"))
+        .order_by()
+    )
+    summaries = {}
+    for row in grouped:
+        month = row["month"]
+        if isinstance(month, datetime):
+            month = timezone.localtime(month).date()
+        summary = summaries.setdefault(
+            (row["wallet_id"], month),
+            WalletMonthlySummary(wallet_id=row["wallet_id"], month=month),
+        )
+        if row["tx_type"] == "Credit":
+            summary.credit_total += row["total"]
+            summary.credit_count += row["entries"]
+        else:
+            summary.debit_total += row["total"]
+            summary.debit_count += row["entries"]
+    WalletMonthlySummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0017_transaction_history_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('credit_count', models.PositiveIntegerField(default=0)),
+                ('debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('debit_count', models.PositiveIntegerField(default=0)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='services.studentwallet')),
+            ],
+            options={
+                'verbose_name_plural': 'Wallet Monthly Summaries',
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'month'), name='unique_wallet_month_summary')],
+            },
+        ),
+        migrations.RunPython(summarize_existing_transactions, migrations.RunPython.noop),
+    ]
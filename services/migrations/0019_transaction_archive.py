@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0018_walletmonthlysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month', unique=True)),
+                ('path', models.CharField(max_length=255)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='tx_type',
+            field=models.CharField(choices=[('Credit', 'Deposit'), ('Debit', 'Meal Payment'), ('Checkpoint', 'Balance Brought Forward')], max_length=10),
+        ),
+        migrations.CreateModel(
+            name='TransactionArchiveSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.PositiveBigIntegerField()),
+                ('length', models.PositiveIntegerField()),
+                ('row_count', models.PositiveIntegerField()),
+                ('archive', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='services.transactionarchive')),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='services.studentwallet')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'archive'), name='unique_archive_wallet_segment')],
+            },
+        ),
+    ]
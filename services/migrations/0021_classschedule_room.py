@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0020_enrollment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classschedule',
+            name='room',
+            field=models.CharField(blank=True, max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='classschedule',
+            index=models.Index(fields=['room', 'day_of_week'], name='class_room_day_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:12
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copy of settings.PAYMENT_MAX_ATTEMPTS when this migration was written
+MAX_ATTEMPTS = 5
+
+
+def fail_exhausted_callbacks(apps, schema_editor):
+    """Callbacks that already used every attempt were stuck as pending."""
+    PaymentCallback = apps.get_model("services", "PaymentCallback")
+    PaymentCallback.objects.filter(
+        status="pending", attempts__gte=MAX_ATTEMPTS
+    ).update(
+        status="failed",
+        note="Gave up: gateway unavailable",
+        processed_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0022_calendarfeedversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentcallback',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='paymentcallback',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('credited', 'Credited'), ('rejected', 'Rejected'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.RunPython(fail_exhausted_callbacks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+SIGNUP_BONUS = Decimal("500.00")
+BONUS_DESCRIPTION = "Initial Signup Bonus"
+BATCH_SIZE = 1000
+
+
+def backfill_signup_bonus(apps, schema_editor):
+    """
+    Wallets opened before the bonus was recorded start at 500.00 with no
+    ledger row, so reconcile_wallets would report every one as drifted.
+    Each gets its opening Credit, dated when the student joined, and the
+    matching monthly rollup is bumped.
+    """
+    StudentWallet = apps.get_model("services", "StudentWallet")
+    Transaction = apps.get_model("services", "Transaction")
+    WalletMonthlySummary = apps.get_model("services", "WalletMonthlySummary")
+
+    has_bonus = Transaction.objects.filter(
+        wallet_id=OuterRef("pk"), tx_type="Credit", description=BONUS_DESCRIPTION
+    )
+    missing = (
+        StudentWallet.objects.filter(~Exists(has_bonus))
+        .values_list("id", "user__date_joined")
+        .order_by("id")
+    )
+    joined_at = StudentWallet.objects.filter(pk=OuterRef("wallet_id")).values(
+        "user__date_joined"
+    )[:1]
+
+    while True:
+        batch = list(missing[:BATCH_SIZE])
+        if not batch:
+            break
+        created = Transaction.objects.bulk_create(
+            Transaction(
+                wallet_id=wallet_id,
+                amount=SIGNUP_BONUS,
+                tx_type="Credit",
+                description=BONUS_DESCRIPTION,
+            )
+            for wallet_id, _ in batch
+        )
+        # timestamp is auto_now_add, so it is moved back to the join date afterwards
+        Transaction.objects.filter(pk__in=[row.pk for row in created]).update(
+            timestamp=Subquery(joined_at)
+        )
+
+        months = {
+            wallet_id: timezone.localtime(joined).date().replace(day=1)
+            for wallet_id, joined in batch
+        }
+        summaries = WalletMonthlySummary.objects.filter(
+            wallet_id__in=months, month__in=set(months.values())
+        )
+        existing = [s for s in summaries if months[s.wallet_id] == s.month]
+        for summary in existing:
+            summary.credit_total += SIGNUP_BONUS
+            summary.credit_count += 1
+        WalletMonthlySummary.objects.bulk_update(
+            existing, ["credit_total", "credit_count"], batch_size=BATCH_SIZE
+        )
+        seen = {summary.wallet_id for summary in existing}
+        WalletMonthlySummary.objects.bulk_create(
+            WalletMonthlySummary(
+                wallet_id=wallet_id,
+                month=month,
+                credit_total=SIGNUP_BONUS,
+                credit_count=1,
+            )
+            for wallet_id, month in months.items()
+            if wallet_id not in seen
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("services", "0023_paymentcallback_claim"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_signup_bonus, migrations.RunPython.noop),
+    ]
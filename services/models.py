@@ -1,9 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, IntegerField, Value, When
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.core.mail import send_mail
 from django.conf import settings
+from django.utils import timezone
+from decimal import Decimal
 
 # ==========================================
 # 1. TRANSPORT FEATURE
@@ -14,6 +16,9 @@ class BusRoute(models.Model):
     route_name = models.CharField(max_length=100)
     start_location = models.CharField(max_length=100)
     end_location = models.CharField(max_length=100)
+    subscribers = models.ManyToManyField(
+        User, related_name="bus_subscriptions", blank=True
+    )
 
     class Meta:
         verbose_name_plural = "Bus Routes"
@@ -28,6 +33,14 @@ class BusSchedule(models.Model):
     arrival_time = models.TimeField()
     last_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["route", "departure_time", "arrival_time"],
+                name="unique_bus_schedule_slot",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.route.route_name} | {self.departure_time} - {self.arrival_time}"
 
@@ -35,23 +48,22 @@ class BusSchedule(models.Model):
 @receiver(post_save, sender=BusSchedule)
 def notify_bus_update(sender, instance, **kwargs):
     """Automated email alerts for transport updates."""
-    # This logic triggers automatically whenever a BusSchedule is saved
-    recipient_list = list(User.objects.values_list("email", flat=True))
-    if recipient_list:
-        subject = f"Transport Update: {instance.route.route_name}"
-        message = (
-            f"Dear User,\n\nThe bus schedule for {instance.route.route_name} has been updated.\n"
-            f"New Departure: {instance.departure_time}\n"
-            f"New Arrival: {instance.arrival_time}\n\n"
-            f"Please check the CampusMS app for further details."
-        )
-        send_mail(
-            subject,
-            message,
-            settings.EMAIL_HOST_USER,
-            recipient_list,
-            fail_silently=True,
-        )
+    # Saves are queued and merged into one digest per subscriber after commit,
+    # so the admin request never waits on SMTP.
+    from .notifications import queue_schedule_update
+
+    transaction.on_commit(lambda: queue_schedule_update(instance.pk))
+
+
+@receiver(post_save, sender=BusSchedule)
+@receiver(post_delete, sender=BusSchedule)
+@receiver(post_save, sender=BusRoute)
+@receiver(post_delete, sender=BusRoute)
+def refresh_departure_index(sender, **kwargs):
+    """Keeps the in-process next-departure index in step with the timetable."""
+    from .departures import queue_departure_rebuild
+
+    queue_departure_rebuild()
 
 
 # ==========================================
@@ -59,6 +71,28 @@ def notify_bus_update(sender, instance, **kwargs):
 # ==========================================
 
 
+# Chronological order of service within a single day
+MEAL_SEQUENCE = ["Breakfast", "Lunch", "Snacks", "Dinner"]
+
+
+class CafeteriaMenuQuerySet(models.QuerySet):
+    def window(self, start, end):
+        """Restricts the menu to the inclusive date range [start, end]."""
+        return self.filter(day__range=(start, end))
+
+    def in_meal_order(self):
+        """Orders by day, then Breakfast -> Lunch -> Snacks -> Dinner in SQL."""
+        meal_rank = Case(
+            *[
+                When(meal_type=meal, then=Value(rank))
+                for rank, meal in enumerate(MEAL_SEQUENCE, start=1)
+            ],
+            default=Value(len(MEAL_SEQUENCE) + 1),
+            output_field=IntegerField(),
+        )
+        return self.annotate(meal_rank=meal_rank).order_by("day", "meal_rank")
+
+
 class CafeteriaMenu(models.Model):
     MEAL_CHOICES = [
         ("Breakfast", "Breakfast"),
@@ -71,14 +105,39 @@ class CafeteriaMenu(models.Model):
     description = models.TextField()
     price = models.DecimalField(max_digits=6, decimal_places=2)
 
+    objects = CafeteriaMenuQuerySet.as_manager()
+
     class Meta:
         ordering = ["day", "meal_type"]
         verbose_name_plural = "Cafeteria Menus"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "meal_type"], name="unique_cafeteria_day_meal"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.day} | {self.meal_type} - {self.description[:30]}"
 
 
+@receiver(post_save, sender=BusSchedule)
+@receiver(post_delete, sender=BusSchedule)
+@receiver(post_save, sender=CafeteriaMenu)
+@receiver(post_delete, sender=CafeteriaMenu)
+def publish_live_update(sender, instance, **kwargs):
+    """Pushes timetable and menu changes to browsers connected to the SSE feed."""
+    from .live import hub
+
+    if sender is BusSchedule:
+        event = "bus_schedule"
+        data = {"id": instance.pk, "route": instance.route_id}
+    else:
+        event = "cafeteria_menu"
+        data = {"id": instance.pk, "day": instance.day.isoformat()}
+    data["action"] = "saved" if "created" in kwargs else "deleted"
+    transaction.on_commit(lambda: hub.publish(event, data))
+
+
 class MealBooking(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     date_from = models.DateField()
@@ -95,6 +154,74 @@ class MealBooking(models.Model):
         return (self.date_to - self.date_from).days + 1
 
 
+class MealHeadcount(models.Model):
+    """Plates booked per day and meal, maintained from MealBooking ranges."""
+
+    MEAL_CHOICES = [
+        ("breakfast", "Breakfast"),
+        ("lunch", "Lunch"),
+        ("dinner", "Dinner"),
+    ]
+    day = models.DateField()
+    meal = models.CharField(max_length=10, choices=MEAL_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["day", "meal"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "meal"], name="unique_headcount_day_meal"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} | {self.meal}: {self.count}"
+
+
+class MealRedemption(models.Model):
+    """One served plate; the unique key stops a booking being used twice per meal."""
+
+    booking = models.ForeignKey(
+        MealBooking, on_delete=models.CASCADE, related_name="redemptions"
+    )
+    day = models.DateField()
+    meal = models.CharField(max_length=10, choices=MealHeadcount.MEAL_CHOICES)
+    station = models.CharField(max_length=50, blank=True)
+    redeemed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["booking", "day", "meal"], name="unique_redemption_per_meal"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Booking {self.booking_id} | {self.day} {self.meal}"
+
+
+@receiver(pre_save, sender=MealBooking)
+def remember_previous_booking(sender, instance, **kwargs):
+    """Keeps the stored ranges so an edit can be applied as remove + add."""
+    instance._previous_booking = (
+        MealBooking.objects.filter(pk=instance.pk).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=MealBooking)
+def add_booking_headcount(sender, instance, **kwargs):
+    from .headcount import apply_booking_change
+
+    apply_booking_change(getattr(instance, "_previous_booking", None), instance)
+
+
+@receiver(post_delete, sender=MealBooking)
+def remove_booking_headcount(sender, instance, **kwargs):
+    from .headcount import apply_booking_change
+
+    apply_booking_change(instance, None)
+
+
 # ==========================================
 # 3. ACADEMICS & FACULTY
 # ==========================================
@@ -136,11 +263,85 @@ class ClassSchedule(models.Model):
     day_of_week = models.CharField(max_length=15, choices=DAYS)
     start_time = models.TimeField()
     end_time = models.TimeField()
+    room = models.CharField(max_length=30, blank=True)
+
+    class Meta:
+        indexes = [
+            # Loads one room's day when checking a new slot for clashes
+            models.Index(fields=["room", "day_of_week"], name="class_room_day_idx"),
+        ]
 
     def __str__(self):
         return f"{self.course.name} on {self.day_of_week}"
 
 
+class Enrollment(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="enrollments")
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="enrollments"
+    )
+    enrolled_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "course"], name="unique_course_enrollment"
+            ),
+        ]
+        indexes = [
+            # Finds the students whose timetables a schedule edit invalidates
+            models.Index(fields=["course", "user"], name="enrollment_course_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} in {self.course.code}"
+
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def expire_enrollment_timetable(sender, instance, **kwargs):
+    from .timetable import expire_timetables
+
+    expire_timetables(user_ids=[instance.user_id])
+
+
+@receiver(pre_save, sender=ClassSchedule)
+def remember_previous_course(sender, instance, **kwargs):
+    """A slot moved to another course changes both courses' timetables."""
+    instance._previous_course_id = (
+        ClassSchedule.objects.filter(pk=instance.pk)
+        .values_list("course_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver([post_save, post_delete], sender=ClassSchedule)
+def expire_schedule_timetables(sender, instance, **kwargs):
+    from .timetable import expire_timetables
+
+    course_ids = {instance.course_id, getattr(instance, "_previous_course_id", None)}
+    expire_timetables(course_ids=course_ids - {None})
+
+
+@receiver(post_save, sender=Course)
+def expire_course_timetables(sender, instance, created, **kwargs):
+    # Course deletes cascade to ClassSchedule and Enrollment, which expire on their own
+    if not created:
+        from .timetable import expire_timetables
+
+        expire_timetables(course_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Faculty)
+def expire_faculty_timetables(sender, instance, created, **kwargs):
+    """Timetables embed the faculty contacts of each enrolled course."""
+    if not created:
+        from .timetable import expire_timetables
+
+        expire_timetables(course_ids=instance.course_set.values_list("id", flat=True))
+
+
 # ==========================================
 # 4. EVENTS & CLUBS
 # ==========================================
@@ -164,6 +365,83 @@ class Event(models.Model):
         return f"{self.event_name} - {self.event_date.date()}"
 
 
+class CalendarFeedVersion(models.Model):
+    """
+    Change counter behind the .ics feeds. Keys are "events", "course:<id>",
+    "route:<id>" and "user:<id>"; a feed's ETag is derived from the counters
+    of the keys it is built from.
+    """
+
+    key = models.CharField(max_length=40, unique=True)
+    counter = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.key} v{self.counter}"
+
+
+@receiver([post_save, post_delete], sender=Event)
+def bump_event_feeds(sender, instance, **kwargs):
+    from .ical import bump_feeds
+
+    bump_feeds(["events"])
+
+
+@receiver([post_save, post_delete], sender=ClassSchedule)
+def bump_schedule_feeds(sender, instance, **kwargs):
+    from .ical import bump_feeds
+
+    # _previous_course_id is set by remember_previous_course
+    course_ids = {instance.course_id, getattr(instance, "_previous_course_id", None)}
+    bump_feeds(f"course:{pk}" for pk in course_ids - {None})
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Faculty)
+def bump_course_feeds(sender, instance, created, **kwargs):
+    """Feeds embed course names and faculty, so renames reach them too."""
+    if not created:
+        from .ical import bump_feeds
+
+        course_ids = (
+            [instance.pk]
+            if sender is Course
+            else instance.course_set.values_list("id", flat=True)
+        )
+        bump_feeds(f"course:{pk}" for pk in course_ids)
+
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def bump_enrollment_feed(sender, instance, **kwargs):
+    from .ical import bump_feeds
+
+    bump_feeds([f"user:{instance.user_id}"])
+
+
+@receiver([post_save, post_delete], sender=BusSchedule)
+@receiver(post_save, sender=BusRoute)
+def bump_route_feeds(sender, instance, **kwargs):
+    from .ical import bump_feeds
+
+    route_id = instance.pk if sender is BusRoute else instance.route_id
+    bump_feeds([f"route:{route_id}"])
+
+
+@receiver(m2m_changed, sender=BusRoute.subscribers.through)
+def bump_subscriber_feeds(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    from .ical import bump_feeds
+
+    if reverse:
+        user_ids = [instance.pk]
+    elif action == "pre_clear":
+        user_ids = instance.subscribers.values_list("id", flat=True)
+    else:
+        user_ids = pk_set
+    bump_feeds(f"user:{pk}" for pk in user_ids)
+
+
 # ==========================================
 # 5. CAMPUS NAVIGATION
 # ==========================================
@@ -193,6 +471,8 @@ class Transaction(models.Model):
     TRANSACTION_TYPES = (
         ("Credit", "Deposit"),
         ("Debit", "Meal Payment"),
+        # Signed balance of all archived rows (services.archive)
+        ("Checkpoint", "Balance Brought Forward"),
     )
     wallet = models.ForeignKey(
         StudentWallet, on_delete=models.CASCADE, related_name="transactions"
@@ -201,12 +481,132 @@ class Transaction(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     tx_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
     description = models.CharField(max_length=255)
+    # Set by services.ledger so a retried request cannot post the same entry twice
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Serves keyset pagination of a wallet's history, newest first
+            models.Index(
+                fields=["wallet", "-timestamp", "-id"], name="transaction_history_idx"
+            ),
+        ]
+
+
+class WalletMonthlySummary(models.Model):
+    """Per-wallet credit/debit totals for one calendar month (local time)."""
+
+    wallet = models.ForeignKey(
+        StudentWallet, on_delete=models.CASCADE, related_name="monthly_summaries"
+    )
+    month = models.DateField(help_text="First day of the month")
+    credit_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    credit_count = models.PositiveIntegerField(default=0)
+    debit_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    debit_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Wallet Monthly Summaries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["wallet", "month"], name="unique_wallet_month_summary"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Wallet {self.wallet_id} | {self.month:%Y-%m}"
+
+
+@receiver(post_save, sender=Transaction)
+def roll_up_transaction(sender, instance, created, **kwargs):
+    """Adds each new entry to its month's totals inside the inserting transaction."""
+    if created and instance.tx_type != "Checkpoint":
+        from .rollups import add_to_monthly_rollup
+
+        add_to_monthly_rollup(
+            instance.wallet_id, instance.timestamp, instance.tx_type, instance.amount
+        )
+
+
+class TransactionArchive(models.Model):
+    """One month of Transaction rows moved to a compressed NDJSON segment file."""
+
+    month = models.DateField(unique=True, help_text="First day of the month")
+    path = models.CharField(max_length=255)
+    row_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-month"]
+
+    def __str__(self):
+        return f"Archive {self.month:%Y-%m} ({self.row_count} rows)"
+
+
+class TransactionArchiveSegment(models.Model):
+    """Byte range of one wallet's gzip member inside a monthly archive file."""
+
+    archive = models.ForeignKey(
+        TransactionArchive, on_delete=models.CASCADE, related_name="segments"
+    )
+    wallet = models.ForeignKey(StudentWallet, on_delete=models.CASCADE)
+    offset = models.PositiveBigIntegerField()
+    length = models.PositiveIntegerField()
+    row_count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["wallet", "archive"], name="unique_archive_wallet_segment"
+            ),
+        ]
+
+
+class PaymentCallback(models.Model):
+    """Inbox of gateway callbacks; the unique tran_id rejects duplicate deliveries."""
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("credited", "Credited"),
+        ("rejected", "Rejected"),
+        ("failed", "Failed"),
+    ]
+    tran_id = models.CharField(max_length=64, unique=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    note = models.CharField(max_length=255, blank=True)
+    # Lease held by the worker validating this callback
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    transaction = models.OneToOneField(
+        Transaction, on_delete=models.SET_NULL, null=True, blank=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="payment_callback_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.tran_id} ({self.status})"
+
+
+SIGNUP_BONUS = Decimal("500.00")
 
 
 @receiver(post_save, sender=User)
 def create_user_wallet(sender, instance, created, **kwargs):
     if created:
-        StudentWallet.objects.create(user=instance, balance=500.00)
+        wallet = StudentWallet.objects.create(user=instance, balance=SIGNUP_BONUS)
+        # Record the bonus so the ledger sums to the balance (see reconcile_wallets)
+        Transaction.objects.create(
+            wallet=wallet,
+            amount=SIGNUP_BONUS,
+            tx_type="Credit",
+            description="Initial Signup Bonus",
+        )
 
 
 class Profile(models.Model):
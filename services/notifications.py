@@ -0,0 +1,147 @@
+# services/notifications.py
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.mail import get_connection, send_mass_mail
+from django.db import connections
+
+from .models import BusSchedule, BusRoute
+
+logger = logging.getLogger(__name__)
+
+# Schedule ids saved since the last digest went out
+_pending_schedule_ids = set()
+_pending_lock = threading.Lock()
+_digest_timer = None
+
+
+def _digest_window():
+    return getattr(settings, "BUS_NOTIFY_DIGEST_SECONDS", 60)
+
+
+def _chunk_size():
+    return getattr(settings, "BUS_NOTIFY_CHUNK_SIZE", 100)
+
+
+def queue_schedule_update(schedule_id):
+    """Records a changed BusSchedule and arms the digest timer if it is idle."""
+    global _digest_timer
+
+    window = _digest_window()
+    with _pending_lock:
+        _pending_schedule_ids.add(schedule_id)
+        if window > 0 and _digest_timer is None:
+            _digest_timer = threading.Timer(window, _flush_in_background)
+            _digest_timer.daemon = True
+            _digest_timer.start()
+
+    if window <= 0:
+        flush_schedule_updates()
+
+
+def _flush_in_background():
+    try:
+        flush_schedule_updates()
+    finally:
+        # The timer thread owns its own DB connection; release it
+        connections.close_all()
+
+
+def _flush_at_exit():
+    """
+    The digest timer is a daemon thread, so edits made from a shell, a script
+    or just before a worker restart would otherwise never be mailed.
+    """
+    if not _pending_schedule_ids:
+        return
+    try:
+        flush_schedule_updates()
+    except Exception:
+        logger.exception("Could not send the pending bus schedule digest")
+
+
+atexit.register(_flush_at_exit)
+
+
+def _build_digest_messages(schedule_ids):
+    """Returns one (subject, message, from, [email]) tuple per subscribed rider."""
+    schedules = (
+        BusSchedule.objects.filter(id__in=schedule_ids)
+        .select_related("route")
+        .order_by("route__route_name", "departure_time")
+    )
+    changes_by_route = OrderedDict()
+    for schedule in schedules:
+        changes_by_route.setdefault(schedule.route, []).append(schedule)
+    if not changes_by_route:
+        return []
+
+    routes_by_email = OrderedDict()
+    subscriptions = (
+        BusRoute.subscribers.through.objects.filter(
+            busroute_id__in=[route.id for route in changes_by_route]
+        )
+        .exclude(user__email="")
+        .values_list("user__email", "busroute_id")
+        .order_by("user__email")
+    )
+    for email, route_id in subscriptions:
+        routes_by_email.setdefault(email, set()).add(route_id)
+
+    messages = []
+    for email, route_ids in routes_by_email.items():
+        routes = [route for route in changes_by_route if route.id in route_ids]
+        subject = "Transport Update: " + ", ".join(r.route_name for r in routes)
+        lines = ["Dear User,", "", "The following bus schedules have been updated:"]
+        for route in routes:
+            lines.append("")
+            lines.append(f"{route.route_name}:")
+            for schedule in changes_by_route[route]:
+                lines.append(
+                    f"  Departure {schedule.departure_time} - Arrival {schedule.arrival_time}"
+                )
+        lines += ["", "Please check the CampusMS app for further details."]
+        messages.append((subject, "\n".join(lines), settings.EMAIL_HOST_USER, [email]))
+    return messages
+
+
+def flush_schedule_updates():
+    """Sends the pending digest in chunks over a single SMTP connection."""
+    global _digest_timer
+
+    with _pending_lock:
+        schedule_ids = list(_pending_schedule_ids)
+        _pending_schedule_ids.clear()
+        if _digest_timer is not None:
+            _digest_timer.cancel()
+            _digest_timer = None
+
+    return send_schedule_digest(schedule_ids)
+
+
+def send_schedule_digest(schedule_ids):
+    """Emails one summary of the given schedules to each subscribed rider."""
+    if not schedule_ids:
+        return 0
+
+    messages = _build_digest_messages(schedule_ids)
+    if not messages:
+        return 0
+
+    chunk_size = _chunk_size()
+    connection = get_connection(fail_silently=True)
+    connection.open()
+    try:
+        sent = 0
+        for start in range(0, len(messages), chunk_size):
+            sent += send_mass_mail(
+                messages[start : start + chunk_size],
+                fail_silently=True,
+                connection=connection,
+            )
+    finally:
+        connection.close()
+    return sent
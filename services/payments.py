@@ -0,0 +1,236 @@
+# services/payments.py
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+import requests
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import ledger
+from .models import PaymentCallback, Profile, StudentWallet
+from .sms import queue_wallet_alert
+
+SSLCOMMERZ_VALIDATION_URLS = {
+    True: "https://sandbox.sslcommerz.com/validator/api/validationserverAPI.php",
+    False: "https://securepay.sslcommerz.com/validator/api/validationserverAPI.php",
+}
+
+
+class GatewayUnavailable(Exception):
+    """Raised for transient validation failures; the callback is retried later."""
+
+
+class SSLCommerzValidator:
+    """Confirms a callback with the SSLCommerz validation API before crediting."""
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.url = SSLCOMMERZ_VALIDATION_URLS[bool(settings.SSLCOMMERZ_SANDBOX)]
+
+    def validate(self, payload):
+        """
+        Returns (is_valid, verified, note). verified holds the gateway's own
+        amount and value_a (our wallet id), never the callback's copies.
+        """
+        try:
+            response = self.session.get(
+                self.url,
+                params={
+                    "val_id": payload.get("val_id", ""),
+                    "store_id": settings.SSLCOMMERZ_STORE_ID,
+                    "store_passwd": settings.SSLCOMMERZ_STORE_PASS,
+                    "format": "json",
+                },
+                timeout=10,
+            )
+            response.raise_for_status()
+            result = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise GatewayUnavailable(str(e))
+
+        if result.get("status") not in ("VALID", "VALIDATED"):
+            return False, None, f"Gateway status {result.get('status')}"
+        if result.get("tran_id") != payload.get("tran_id"):
+            return False, None, "tran_id mismatch"
+        try:
+            amount = Decimal(result["amount"])
+        except (KeyError, TypeError, InvalidOperation):
+            return False, None, "Gateway sent no amount"
+        return True, {"amount": amount, "value_a": result.get("value_a")}, "Validated"
+
+
+class LocalGatewayStandIn:
+    """
+    Offline stand-in for SSLCommerz used in tests and local development:
+    accepts callbacks whose own payload says status=VALID.
+    """
+
+    def validate(self, payload):
+        if payload.get("status") != "VALID":
+            return False, None, f"Gateway status {payload.get('status')}"
+        try:
+            amount = Decimal(payload["amount"])
+        except (KeyError, TypeError, InvalidOperation):
+            return False, None, "Missing amount"
+        verified = {"amount": amount, "value_a": payload.get("value_a")}
+        return True, verified, "Validated locally"
+
+
+def get_validator():
+    return import_string(settings.PAYMENT_VALIDATOR)()
+
+
+def record_callback(payload):
+    """
+    Stores a gateway callback in the inbox. Returns (callback, created); a
+    repeated tran_id is rejected by the unique index without further work.
+    """
+    tran_id = (payload.get("tran_id") or "").strip()[:64]
+    if not tran_id:
+        return None, False
+    try:
+        with transaction.atomic():
+            callback = PaymentCallback.objects.create(tran_id=tran_id, payload=payload)
+        return callback, True
+    except IntegrityError:
+        return PaymentCallback.objects.filter(tran_id=tran_id).first(), False
+
+
+def process_pending_callbacks(batch_size=None, validator=None):
+    """
+    Validates and credits one batch of pending callbacks. Returns the batch size.
+
+    Rows are claimed in one short transaction and validated with no locks
+    held, since validation is a network call. Each callback is then credited
+    in its own transaction.
+    """
+    batch_size = batch_size or settings.PAYMENT_BATCH_SIZE
+    validator = validator or get_validator()
+    max_attempts = settings.PAYMENT_MAX_ATTEMPTS
+
+    batch = _claim(batch_size, max_attempts)
+    credited = []
+    for callback in batch:
+        try:
+            outcome = validator.validate(callback.payload)
+        except GatewayUnavailable as e:
+            _retry_later(callback, e, max_attempts)
+            continue
+        if _settle(callback, *outcome):
+            credited.append(callback)
+
+    for callback in credited:
+        _notify(callback)
+    return len(batch)
+
+
+def _claim(batch_size, max_attempts):
+    """
+    Leases a batch for PAYMENT_CLAIM_SECONDS. Other workers skip leased rows,
+    and a row whose worker died is picked up again when its lease runs out.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.PAYMENT_CLAIM_SECONDS)
+    with transaction.atomic():
+        batch = list(
+            PaymentCallback.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", attempts__lt=max_attempts)
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+            .order_by("id")[:batch_size]
+        )
+        PaymentCallback.objects.filter(pk__in=[c.pk for c in batch]).update(
+            attempts=F("attempts") + 1, claimed_until=lease
+        )
+    for callback in batch:
+        callback.attempts += 1
+        callback.claimed_until = lease
+    return batch
+
+
+def _retry_later(callback, error, max_attempts):
+    # The lease stays in place, so the retry waits until it expires
+    callback.note = f"Retrying: {error}"[:255]
+    if callback.attempts >= max_attempts:
+        callback.status = "failed"
+        callback.note = f"Gave up after {callback.attempts} attempts: {error}"[:255]
+        callback.processed_at = timezone.now()
+    callback.save(update_fields=["status", "note", "processed_at"])
+
+
+def _mismatch(callback, verified):
+    """Fields where the unauthenticated callback disagrees with the gateway."""
+    payload = callback.payload
+    try:
+        amount_matches = Decimal(payload.get("amount")) == verified["amount"]
+    except (TypeError, InvalidOperation):
+        amount_matches = False
+    if not amount_matches:
+        return "amount"
+    if str(payload.get("value_a")) != str(verified["value_a"]):
+        return "value_a"
+    return None
+
+
+def _settle(callback, is_valid, verified, note):
+    """Records the validation outcome and credits the wallet. True if credited."""
+    callback.note = note[:255]
+    with transaction.atomic():
+        # A worker whose lease ran out may have finished this row already
+        if not (
+            PaymentCallback.objects.select_for_update()
+            .filter(pk=callback.pk, status="pending")
+            .exists()
+        ):
+            return False
+
+        mismatch = _mismatch(callback, verified) if is_valid else None
+        if not is_valid:
+            callback.status = "rejected"
+        elif mismatch:
+            callback.status = "rejected"
+            callback.note = f"Callback {mismatch} differs from the gateway's"
+        else:
+            try:
+                wallet_id = int(verified["value_a"])
+                if not StudentWallet.objects.filter(pk=wallet_id).exists():
+                    raise ledger.LedgerError(f"Unknown wallet {wallet_id}")
+                entry = ledger.apply(
+                    wallet_id,
+                    verified["amount"],
+                    ledger.CREDIT,
+                    idempotency_key=f"sslcommerz:{callback.tran_id}",
+                    description=f"SSLCommerz Top-up | ID: {callback.tran_id}",
+                )
+            except (TypeError, ValueError, ledger.LedgerError, IntegrityError) as e:
+                callback.status = "rejected"
+                callback.note = f"Cannot credit: {e}"[:255]
+            else:
+                callback.status = "credited"
+                callback.transaction = entry
+
+        callback.processed_at = timezone.now()
+        callback.claimed_until = None
+        callback.save(
+            update_fields=[
+                "status",
+                "note",
+                "processed_at",
+                "claimed_until",
+                "transaction",
+            ]
+        )
+    return callback.status == "credited"
+
+
+def _notify(callback):
+    entry = callback.transaction
+    phone = (
+        Profile.objects.filter(user__studentwallet=entry.wallet_id)
+        .values_list("phone_number", flat=True)
+        .first()
+    )
+    if phone:
+        queue_wallet_alert(phone, entry.amount, ledger.balance(entry.wallet_id))
@@ -0,0 +1,196 @@
+# services/redemption.py
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .headcount import MEALS
+from .meal_qr import booking_id_from_token
+from .models import MealBooking, MealRedemption
+
+# Local hour at which each meal's service window starts
+MEAL_START_HOURS = (("dinner", 16), ("lunch", 11), ("breakfast", 0))
+
+
+def current_meal(moment=None):
+    local = timezone.localtime(moment)
+    for meal, hour in MEAL_START_HOURS:
+        if local.hour >= hour:
+            return meal
+    return "breakfast"
+
+
+def _booking_error(date_from, date_to, booked, day, meal):
+    if not (date_from <= day <= date_to):
+        return f"Booking is not valid on {day}"
+    if not booked:
+        return f"{meal.title()} was not booked"
+    return None
+
+
+def redeem(token, day=None, meal=None, station=""):
+    """
+    Validates a signed QR token and atomically records the plate as served.
+    Returns a dict with status "success", "duplicate" or "error".
+    """
+    day = day or timezone.localdate()
+    meal = meal or current_meal()
+    if meal not in MEALS:
+        return {"status": "error", "message": f"Unknown meal '{meal}'"}
+
+    booking_id = booking_id_from_token(token)
+    if booking_id is None:
+        return {"status": "error", "message": "Invalid or Corrupted QR Code"}
+
+    # Primary-key lookup, projecting only what the check needs
+    row = (
+        MealBooking.objects.filter(pk=booking_id)
+        .values_list("date_from", "date_to", meal, "user__username")
+        .first()
+    )
+    if row is None:
+        return {"status": "error", "message": "Booking no longer exists"}
+    date_from, date_to, booked, username = row
+    error = _booking_error(date_from, date_to, booked, day, meal)
+    if error:
+        return {"status": "error", "message": error}
+
+    try:
+        with transaction.atomic():
+            MealRedemption.objects.create(
+                booking_id=booking_id, day=day, meal=meal, station=station
+            )
+    except IntegrityError:
+        return {
+            "status": "duplicate",
+            "message": f"{meal.title()} already served to {username}",
+        }
+
+    return {
+        "status": "success",
+        "message": f"Valid Booking for {username}",
+        "details": {"booking": booking_id, "day": day.isoformat(), "meal": meal},
+    }
+
+
+def redeem_batch(scans, station=""):
+    """
+    Applies a station's queued scans in one transaction. Each scan is a dict
+    with "data" (QR token) and optional "meal" and "scanned_at" (datetime).
+    Returns one result dict per scan, in input order.
+    """
+    results = [None] * len(scans)
+    candidates = []
+    for position, scan in enumerate(scans):
+        scanned_at = scan.get("scanned_at") or timezone.now()
+        meal = scan.get("meal") or current_meal(scanned_at)
+        booking_id = booking_id_from_token(scan.get("data"))
+        if meal not in MEALS:
+            results[position] = _error(f"Unknown meal '{meal}'")
+        elif booking_id is None:
+            results[position] = _error("Invalid or Corrupted QR Code")
+        else:
+            day = timezone.localdate(scanned_at)
+            candidates.append((scanned_at, position, booking_id, day, meal))
+
+    booking_ids = {c[2] for c in candidates}
+    bookings = {
+        pk: rest
+        for pk, *rest in MealBooking.objects.filter(pk__in=booking_ids).values_list(
+            "pk", "date_from", "date_to", *MEALS, "user__username"
+        )
+    }
+
+    with transaction.atomic():
+        recorded = _recorded(booking_ids, {c[3] for c in candidates})
+
+        # Earliest scan wins when the same plate appears twice in one batch
+        pending = {}
+        for scanned_at, position, booking_id, day, meal in sorted(candidates):
+            row = bookings.get(booking_id)
+            if row is None:
+                results[position] = _error("Booking no longer exists")
+                continue
+            date_from, date_to, *flags, username = row
+            booked = flags[MEALS.index(meal)]
+            error = _booking_error(date_from, date_to, booked, day, meal)
+            if error:
+                results[position] = _error(error)
+                continue
+
+            key = (booking_id, day, meal)
+            earlier = recorded.get(key) or pending.get(key)
+            if earlier:
+                results[position] = _repeat_result(
+                    earlier, station, scanned_at, meal, username
+                )
+                continue
+            pending[key] = (station, scanned_at)
+            results[position] = {
+                "status": "success",
+                "message": f"Valid Booking for {username}",
+            }
+
+        MealRedemption.objects.bulk_create(
+            [
+                MealRedemption(
+                    booking_id=booking_id,
+                    day=day,
+                    meal=meal,
+                    station=station,
+                    redeemed_at=scanned_at,
+                )
+                for (booking_id, day, meal), (_, scanned_at) in pending.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+        # A single-scan redemption may have landed between the read and the
+        # insert; re-read so those plates are reported as conflicts, not served.
+        if pending:
+            stored = _recorded(
+                {key[0] for key in pending}, {key[1] for key in pending}
+            )
+            for scanned_at, position, booking_id, day, meal in candidates:
+                key = (booking_id, day, meal)
+                if pending.get(key) == (station, scanned_at) and stored.get(key) != (
+                    station,
+                    scanned_at,
+                ):
+                    username = bookings[booking_id][-1]
+                    results[position] = _repeat_result(
+                        stored[key], station, scanned_at, meal, username
+                    )
+
+    return results
+
+
+def _error(message):
+    return {"status": "error", "message": message}
+
+
+def _recorded(booking_ids, days):
+    """Maps (booking, day, meal) -> (station, redeemed_at) for existing redemptions."""
+    rows = MealRedemption.objects.filter(
+        booking_id__in=booking_ids, day__in=days
+    ).values_list("booking_id", "day", "meal", "station", "redeemed_at")
+    return {
+        (booking_id, day, meal): (station, redeemed_at)
+        for booking_id, day, meal, station, redeemed_at in rows
+    }
+
+
+def _repeat_result(earlier, station, scanned_at, meal, username):
+    """Classifies a scan whose plate has already been recorded."""
+    earlier_station, earlier_at = earlier
+    if (earlier_station, earlier_at) == (station, scanned_at):
+        # The station is re-sending a batch that was applied before
+        return {"status": "success", "message": f"Valid Booking for {username}"}
+    if earlier_station != station:
+        where = earlier_station or "another station"
+        return {
+            "status": "conflict",
+            "message": f"{meal.title()} already served to {username} at {where}",
+        }
+    return {
+        "status": "duplicate",
+        "message": f"{meal.title()} already served to {username}",
+    }
@@ -0,0 +1,98 @@
+# services/rollups.py
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Transaction, TransactionArchive, WalletMonthlySummary
+
+
+def month_start(moment):
+    """First day of the local calendar month containing an aware datetime."""
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def month_bounds(month):
+    """Half-open [start, end) aware datetimes for the month beginning at `month`."""
+    following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(month, time.min), tz),
+        timezone.make_aware(datetime.combine(following, time.min), tz),
+    )
+
+
+def _rollup_columns(tx_type):
+    if tx_type == "Credit":
+        return "credit_total", "credit_count"
+    return "debit_total", "debit_count"
+
+
+def add_to_monthly_rollup(wallet_id, timestamp, tx_type, amount, count=1):
+    total_field, count_field = _rollup_columns(tx_type)
+    month = month_start(timestamp)
+    changes = {
+        total_field: F(total_field) + Decimal(amount),
+        count_field: F(count_field) + count,
+    }
+
+    with transaction.atomic():
+        summaries = WalletMonthlySummary.objects.filter(wallet_id=wallet_id, month=month)
+        if summaries.update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                WalletMonthlySummary.objects.create(
+                    wallet_id=wallet_id,
+                    month=month,
+                    **{total_field: Decimal(amount), count_field: count},
+                )
+        except IntegrityError:
+            # Another insert created the month first; add on top of it
+            summaries.update(**changes)
+
+
+def monthly_summary(wallet_id, month):
+    """Returns the month's rollup row, or an unsaved zero row if there is none."""
+    return WalletMonthlySummary.objects.filter(
+        wallet_id=wallet_id, month=month
+    ).first() or WalletMonthlySummary(wallet_id=wallet_id, month=month)
+
+
+def rebuild_monthly_rollups():
+    """
+    Recomputes every rollup row with one grouped aggregate over Transaction.
+    Archived months are no longer in the table, so their rows are kept.
+    """
+    grouped = (
+        Transaction.objects.exclude(tx_type="Checkpoint")
+        .annotate(
+            month=TruncMonth("timestamp", tzinfo=timezone.get_current_timezone())
+        )
+        .values("wallet_id", "month", "tx_type")
+        .annotate(total=Sum("amount"), entries=Count("id"))
+        .order_by()
+    )
+
+    summaries = {}
+    for row in grouped:
+        month = row["month"]
+        if isinstance(month, datetime):
+            month = timezone.localtime(month).date()
+        key = (row["wallet_id"], month)
+        summary = summaries.setdefault(
+            key, WalletMonthlySummary(wallet_id=key[0], month=key[1])
+        )
+        total_field, count_field = _rollup_columns(row["tx_type"])
+        setattr(summary, total_field, getattr(summary, total_field) + row["total"])
+        setattr(summary, count_field, getattr(summary, count_field) + row["entries"])
+
+    with transaction.atomic():
+        WalletMonthlySummary.objects.exclude(
+            month__in=TransactionArchive.objects.values("month")
+        ).delete()
+        WalletMonthlySummary.objects.bulk_create(summaries.values(), batch_size=1000)
+    return len(summaries)
@@ -0,0 +1,207 @@
+# services/scheduling.py
+import random
+import time
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+Session = namedtuple("Session", "course_id faculty_id")
+SolverStats = namedtuple(
+    "SolverStats", "sessions greedy_conflicts iterations moves conflicts seconds"
+)
+
+
+def period_grid(days, first_start, last_end, minutes, gap=0):
+    """Every (day, start, end) teaching period between first_start and last_end."""
+    periods = []
+    for day in days:
+        start = datetime.combine(datetime.min, first_start)
+        while True:
+            end = start + timedelta(minutes=minutes)
+            if end.time() > last_end or end.date() != start.date():
+                break
+            periods.append((day, start.time(), end.time()))
+            start = end + timedelta(minutes=gap)
+    return periods
+
+
+class _IndexedSet:
+    """A set that also supports O(1) random choice, for the local search."""
+
+    def __init__(self, items=()):
+        self.items = []
+        self.positions = {}
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if position < len(self.items):
+            # Move the last item into the hole
+            self.items[position] = last
+            self.positions[last] = position
+
+    def choice(self, rng):
+        return self.items[rng.randrange(len(self.items))]
+
+
+class TimetableSolver:
+    """
+    Places weekly class sessions on (period, room) pairs.
+
+    Hard constraints: a faculty member or a room holds at most one session
+    per period, and neither may use a period blocked by rows that already exist.
+    Soft constraint: sessions of the same course go on different days.
+
+    A greedy pass places the most constrained faculty first, each session on
+    its cheapest period with a free room. Min-conflicts local search then
+    repeatedly moves one clashing session to its cheapest spot until nothing
+    clashes or the iteration budget runs out. Costs come from per-cell
+    occupancy sets and a free-room set per period, so finding a session's
+    best spot is O(periods).
+    """
+
+    HARD = 1000
+
+    def __init__(
+        self, sessions, periods, rooms, blocked_faculty=(), blocked_rooms=(), seed=None
+    ):
+        self.sessions = list(sessions)
+        self.periods = list(periods)
+        self.rooms = sorted(rooms)
+        self.rng = random.Random(seed)
+        # (faculty_id, period index) and (room, period index) taken by existing rows
+        self.blocked_faculty = set(blocked_faculty)
+        self.blocked_room = set(blocked_rooms)
+
+        self.placement = [None] * len(self.sessions)
+        self.faculty_at = defaultdict(set)
+        self.room_at = defaultdict(set)
+        self.course_days = defaultdict(int)
+        self.free_rooms = [
+            {room for room in self.rooms if (room, period) not in self.blocked_room}
+            for period in range(len(self.periods))
+        ]
+
+    # --- occupancy bookkeeping ---
+
+    def _place(self, index, period, room):
+        session = self.sessions[index]
+        self.placement[index] = (period, room)
+        self.faculty_at[session.faculty_id, period].add(index)
+        self.room_at[room, period].add(index)
+        self.free_rooms[period].discard(room)
+        self.course_days[session.course_id, self.periods[period][0]] += 1
+
+    def _unplace(self, index):
+        session = self.sessions[index]
+        period, room = self.placement[index]
+        self.faculty_at[session.faculty_id, period].discard(index)
+        self.room_at[room, period].discard(index)
+        if not self.room_at[room, period] and (room, period) not in self.blocked_room:
+            self.free_rooms[period].add(room)
+        self.course_days[session.course_id, self.periods[period][0]] -= 1
+        self.placement[index] = None
+
+    def _cost(self, index, period, room):
+        session = self.sessions[index]
+        day = self.periods[period][0]
+        hard = (
+            len(self.faculty_at[session.faculty_id, period])
+            + len(self.room_at[room, period])
+            + ((session.faculty_id, period) in self.blocked_faculty)
+            + ((room, period) in self.blocked_room)
+        )
+        return hard * self.HARD + self.course_days[session.course_id, day]
+
+    def _clashes(self, index):
+        session = self.sessions[index]
+        period, room = self.placement[index]
+        return (
+            len(self.faculty_at[session.faculty_id, period]) > 1
+            or len(self.room_at[room, period]) > 1
+            or (session.faculty_id, period) in self.blocked_faculty
+            or (room, period) in self.blocked_room
+        )
+
+    def _best_spot(self, index):
+        """Cheapest (period, room); ties are broken at random to escape plateaus."""
+        best, best_cost = [], None
+        for period, free in enumerate(self.free_rooms):
+            # Any free room is as good as another; a full period forces a clash
+            room = min(free) if free else self.rng.choice(self.rooms)
+            cost = self._cost(index, period, room)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = [(period, room)], cost
+            elif cost == best_cost:
+                best.append((period, room))
+        return self.rng.choice(best)
+
+    # --- solver ---
+
+    def solve(self, max_iterations=20000):
+        started = time.perf_counter()
+        load = defaultdict(int)
+        for session in self.sessions:
+            load[session.faculty_id] += 1
+        order = sorted(
+            range(len(self.sessions)),
+            key=lambda i: (-load[self.sessions[i].faculty_id], self.rng.random()),
+        )
+        for index in order:
+            self._place(index, *self._best_spot(index))
+
+        conflicted = _IndexedSet(
+            i for i in range(len(self.sessions)) if self._clashes(i)
+        )
+        greedy_conflicts = len(conflicted)
+
+        iterations = moves = 0
+        while conflicted and iterations < max_iterations:
+            iterations += 1
+            index = conflicted.choice(self.rng)
+            old = self.placement[index]
+            self._unplace(index)
+            new = self._best_spot(index)
+            self._place(index, *new)
+            if new != old:
+                moves += 1
+            # Only sessions sharing the old or new cells can change status
+            session = self.sessions[index]
+            touched = {index}
+            for period, room in (old, new):
+                touched |= self.faculty_at[session.faculty_id, period]
+                touched |= self.room_at[room, period]
+            for other in touched:
+                if self._clashes(other):
+                    conflicted.add(other)
+                else:
+                    conflicted.discard(other)
+
+        stats = SolverStats(
+            sessions=len(self.sessions),
+            greedy_conflicts=greedy_conflicts,
+            iterations=iterations,
+            moves=moves,
+            conflicts=len(conflicted),
+            seconds=time.perf_counter() - started,
+        )
+        return self.placement, stats
+
+    def clashing_sessions(self):
+        """Indexes of placed sessions that still break a hard constraint."""
+        return [
+            index
+            for index, spot in enumerate(self.placement)
+            if spot is not None and self._clashes(index)
+        ]
@@ -0,0 +1,153 @@
+# services/sms.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from twilio.base.exceptions import TwilioRestException
+from twilio.rest import Client
+
+logger = logging.getLogger(__name__)
+
+
+class SMSError(Exception):
+    """A message the provider refused; retrying will not help."""
+
+
+class TransientSMSError(SMSError):
+    """A timeout, throttle or provider outage; the send is retried with backoff."""
+
+
+class TwilioBackend:
+    """Sends through one Twilio client, so its HTTP session is reused."""
+
+    def __init__(self):
+        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+
+    def send(self, phone, body):
+        try:
+            self.client.messages.create(
+                body=body,
+                from_=settings.TWILIO_PHONE_NUMBER,
+                to=phone,  # Ensure phone is in E.164 format (e.g., +8801...)
+            )
+        except TwilioRestException as e:
+            if e.status == 429 or e.status >= 500:
+                raise TransientSMSError(str(e))
+            raise SMSError(str(e))
+        except requests.RequestException as e:
+            raise TransientSMSError(str(e))
+
+
+class LocalSMSBackend:
+    """
+    Offline backend for tests and local development: messages are appended
+    to LocalSMSBackend.outbox as (phone, body) instead of being sent.
+    """
+
+    outbox = []
+
+    def send(self, phone, body):
+        self.outbox.append((phone, body))
+
+
+# (dotted path, instance), rebuilt only if settings.SMS_BACKEND changes
+_backend = (None, None)
+_backend_lock = threading.Lock()
+
+# phone -> [total credited, credit count, latest balance] since the last flush
+_pending_alerts = OrderedDict()
+_pending_lock = threading.Lock()
+_flush_timer = None
+
+
+def get_backend():
+    """Returns the process-wide backend, built once from settings.SMS_BACKEND."""
+    global _backend
+
+    with _backend_lock:
+        path, backend = _backend
+        if path != settings.SMS_BACKEND:
+            backend = import_string(settings.SMS_BACKEND)()
+            _backend = (settings.SMS_BACKEND, backend)
+        return backend
+
+
+def queue_wallet_alert(phone, amount, new_balance):
+    """
+    Queues a wallet credit alert and returns at once. Alerts for the same
+    number within SMS_COALESCE_SECONDS go out as a single message.
+    """
+    global _flush_timer
+
+    window = settings.SMS_COALESCE_SECONDS
+    with _pending_lock:
+        alert = _pending_alerts.setdefault(phone, [Decimal("0.00"), 0, None])
+        alert[0] += Decimal(amount)
+        alert[1] += 1
+        alert[2] = new_balance
+        if window > 0 and _flush_timer is None:
+            _flush_timer = threading.Timer(window, flush_sms)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+    if window <= 0:
+        flush_sms()
+
+
+def _alert_body(amount, count, new_balance):
+    credited = f"৳{amount} has been credited to your account"
+    if count > 1:
+        credited += f" ({count} top-ups)"
+    return (
+        f"Campus Wallet Alert: {credited}. "
+        f"New Balance: ৳{new_balance}. Stay secure!"
+    )
+
+
+def flush_sms():
+    """Sends every queued alert with bounded concurrency. Returns the number sent."""
+    global _flush_timer
+
+    with _pending_lock:
+        alerts = list(_pending_alerts.items())
+        _pending_alerts.clear()
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+    if not alerts:
+        return 0
+
+    backend = get_backend()
+    messages = [(phone, _alert_body(*alert)) for phone, alert in alerts]
+    workers = max(1, min(settings.SMS_MAX_CONCURRENCY, len(messages)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        sent = pool.map(lambda message: _send_with_retry(backend, *message), messages)
+        return sum(sent)
+
+
+def _send_with_retry(backend, phone, body):
+    delay = settings.SMS_RETRY_BACKOFF_SECONDS
+    for attempt in range(1, settings.SMS_MAX_ATTEMPTS + 1):
+        try:
+            backend.send(phone, body)
+            return 1
+        except TransientSMSError as e:
+            if attempt == settings.SMS_MAX_ATTEMPTS:
+                logger.warning(
+                    "SMS to %s failed after %d attempts: %s", phone, attempt, e
+                )
+                return 0
+            time.sleep(delay)
+            delay *= 2
+        except SMSError as e:
+            logger.warning("SMS to %s rejected: %s", phone, e)
+            return 0
+        except Exception:
+            logger.exception("SMS to %s failed", phone)
+            return 0
@@ -1,10 +1,55 @@
-from django.test import TestCase
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from django.urls import reverse
 from django.contrib.auth.models import User
-from .models import CafeteriaMenu, BusRoute, BusSchedule, StudentWallet, Transaction
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from io import StringIO
+from .models import (
+    CafeteriaMenu,
+    BusRoute,
+    BusSchedule,
+    StudentWallet,
+    Transaction,
+    MealBooking,
+    MealHeadcount,
+    MealRedemption,
+    PaymentCallback,
+    Profile,
+    Faculty,
+    Course,
+    ClassSchedule,
+    Enrollment,
+    Event,
+)
+import asyncio
+import random
+import csv
+import os
+import tempfile
+import zipfile
 import datetime
+import json
+from unittest import mock
 from decimal import Decimal
 from .views import process_meal_payment
+from . import ledger, utils
+from . import notifications
+from .notifications import flush_schedule_updates
+from .departures import next_departures
+from .live import LiveHub
+from . import live as live_hub_module
+from .meal_qr import booking_id_from_token, booking_token
+from .redemption import redeem
+from .history import encode_cursor
+from .payments import process_pending_callbacks, record_callback
+from . import sms
+from .timetable import student_timetable
+from .ical import feed_token
+from .conflicts import audit_conflicts
+from .rollups import month_bounds, month_start, monthly_summary
 
 
 class UniversityAppTests(TestCase):
@@ -41,6 +86,33 @@ class UniversityAppTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Chicken Curry")
 
+    def test_cafeteria_window_excludes_old_menus(self):
+        """Verify menus outside the requested window are not rendered."""
+        CafeteriaMenu.objects.create(
+            day=datetime.date.today() - datetime.timedelta(days=30),
+            meal_type="Dinner",
+            description="Stale Khichuri",
+            price=90.00,
+        )
+        response = self.client.get(reverse("cafeteria_main"))
+        self.assertNotContains(response, "Stale Khichuri")
+
+        past = (datetime.date.today() - datetime.timedelta(days=30)).isoformat()
+        response = self.client.get(reverse("cafeteria_main"), {"from": past, "to": past})
+        self.assertContains(response, "Stale Khichuri")
+        self.assertNotContains(response, "Chicken Curry")
+
+    def test_cafeteria_meal_order(self):
+        """Verify meals within a day are ordered Breakfast -> Lunch -> Snacks -> Dinner."""
+        today = datetime.date.today()
+        for meal_type in ("Dinner", "Snacks", "Breakfast"):
+            CafeteriaMenu.objects.create(
+                day=today, meal_type=meal_type, description=meal_type, price=10
+            )
+        response = self.client.get(reverse("cafeteria_main"))
+        meals = [row["meal_type"] for row in response.context["day_groups"][today]]
+        self.assertEqual(meals, ["Breakfast", "Lunch", "Snacks", "Dinner"])
+
     # --- Test Transport Data ---
     def test_bus_route_creation(self):
         """Verify bus route models work."""
@@ -53,9 +125,8 @@ class WalletSystemTest(TestCase):
         self.user = User.objects.create_user(
             username="teststudent", password="password123"
         )
-        self.wallet = StudentWallet.objects.create(
-            user=self.user, balance=Decimal("500.00")
-        )
+        # create_user_wallet already opened the wallet with a 500.00 balance
+        self.wallet = self.user.studentwallet
 
     def test_successful_meal_payment(self):
         """Verifies credit is deducted and transaction is logged."""
@@ -79,3 +150,1268 @@ class WalletSystemTest(TestCase):
 
         self.assertFalse(success)
         self.assertEqual(self.wallet.balance, Decimal("500.00"))
+
+    def test_idempotent_credit(self):
+        """Replaying a top-up with the same key posts it only once."""
+        first = ledger.apply(self.wallet.pk, "100.00", ledger.CREDIT, "gw:TX1")
+        second = ledger.apply(self.wallet.pk, "100.00", ledger.CREDIT, "gw:TX1")
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(self.wallet.balance, Decimal("600.00"))
+
+    def test_failed_debit_leaves_no_transaction(self):
+        """A rejected debit rolls back its ledger row."""
+        with self.assertRaises(ledger.InsufficientFunds):
+            ledger.apply(self.wallet.pk, "900.00", ledger.DEBIT)
+        self.assertFalse(
+            Transaction.objects.filter(wallet=self.wallet, tx_type="Debit").exists()
+        )
+
+
+class MenuGenerationTest(TestCase):
+    def test_generate_menu_upserts_without_duplicates(self):
+        """Re-running the generator over the same window never duplicates rows."""
+        start = datetime.date(2026, 9, 1)
+        call_command("generate_menu", start=start, days=10, seed=7, stdout=StringIO())
+        first = list(CafeteriaMenu.objects.values_list("day", "meal_type", "description"))
+        call_command("generate_menu", start=start, days=10, seed=7, stdout=StringIO())
+        second = list(CafeteriaMenu.objects.values_list("day", "meal_type", "description"))
+
+        self.assertEqual(len(first), 40)
+        self.assertEqual(first, second)
+
+    def test_generate_menu_keep_existing(self):
+        """--keep-existing preserves menus that were already scheduled."""
+        day = datetime.date(2026, 9, 1)
+        CafeteriaMenu.objects.create(
+            day=day, meal_type="Lunch", description="Chef Special", price=200
+        )
+        call_command(
+            "generate_menu", start=day, days=1, keep_existing=True, stdout=StringIO()
+        )
+        self.assertEqual(
+            CafeteriaMenu.objects.get(day=day, meal_type="Lunch").description,
+            "Chef Special",
+        )
+        self.assertEqual(CafeteriaMenu.objects.filter(day=day).count(), 4)
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    BUS_NOTIFY_DIGEST_SECONDS=3600,
+)
+class BusNotificationTest(TestCase):
+    def setUp(self):
+        self.route = BusRoute.objects.create(
+            route_name="Campus Express", start_location="Main Gate", end_location="Hostel A"
+        )
+        self.rider = User.objects.create_user(
+            username="rider", email="rider@university.edu", password="password123"
+        )
+        User.objects.create_user(
+            username="bystander", email="bystander@university.edu", password="password123"
+        )
+        self.route.subscribers.add(self.rider)
+
+    def test_bulk_edit_produces_single_digest_for_subscribers(self):
+        """Many schedule saves are merged into one email, sent only to route riders."""
+        with self.captureOnCommitCallbacks(execute=True):
+            for hour in range(7, 17):
+                BusSchedule.objects.create(
+                    route=self.route,
+                    departure_time=datetime.time(hour, 0),
+                    arrival_time=datetime.time(hour, 45),
+                )
+        self.assertEqual(len(mail.outbox), 0)
+
+        sent = flush_schedule_updates()
+
+        self.assertEqual(sent, 1)
+        self.assertEqual(mail.outbox[0].to, ["rider@university.edu"])
+        self.assertIn("Departure 16:00:00", mail.outbox[0].body)
+
+    def test_pending_digest_is_sent_at_exit(self):
+        """Edits still waiting for the timer are mailed when the process exits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            BusSchedule.objects.create(
+                route=self.route,
+                departure_time=datetime.time(7, 0),
+                arrival_time=datetime.time(7, 45),
+            )
+        self.assertEqual(len(mail.outbox), 0)
+        notifications._flush_at_exit()
+        self.assertEqual(mail.outbox[0].to, ["rider@university.edu"])
+
+    def test_generate_schedules_bulk_sends_one_summary(self):
+        """Bulk generation inserts all slots once and emails one summary."""
+        BusRoute.objects.create(
+            route_name="City Shuttle", start_location="City", end_location="Campus"
+        )
+        # routes, savepoint, existing slots, insert, release, plus the
+        # 4-query calendar feed bump (savepoint, seed, update, release)
+        with self.assertNumQueries(9):
+            call_command("generate_schedules", no_notify=True, stdout=StringIO())
+        self.assertEqual(BusSchedule.objects.count(), 8)
+
+        BusSchedule.objects.all().delete()
+        call_command("generate_schedules", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+
+        call_command("generate_schedules", stdout=StringIO())
+        self.assertEqual(BusSchedule.objects.count(), 8)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_toggle_route_subscription(self):
+        """Riders can opt out of a route's alerts."""
+        self.client.login(username="rider", password="password123")
+        self.client.post(reverse("toggle_route_subscription", args=[self.route.id]))
+        self.assertFalse(self.route.subscribers.filter(pk=self.rider.pk).exists())
+
+
+class NextDepartureTest(TestCase):
+    def setUp(self):
+        # Send queued digests while the test database still exists, not at exit
+        self.addCleanup(flush_schedule_updates)
+        # One transaction, so the route and its slots share one index rebuild
+        with self.captureOnCommitCallbacks(execute=True):
+            self.route = BusRoute.objects.create(
+                route_name="Campus Express",
+                start_location="Main Gate",
+                end_location="Hostel A",
+            )
+            for dep, arr in [((16, 30), (17, 15)), ((7, 30), (8, 15)), ((14, 0), (14, 45))]:
+                BusSchedule.objects.create(
+                    route=self.route,
+                    departure_time=datetime.time(*dep),
+                    arrival_time=datetime.time(*arr),
+                )
+
+    def test_next_departures_wraps_to_next_day(self):
+        """Lookups binary-search the sorted departures and wrap past midnight."""
+        result = next_departures(self.route.id, datetime.time(15, 0), k=3)
+        self.assertEqual(
+            [(d["departure"], d["day_offset"]) for d in result["departures"]],
+            [
+                (datetime.time(16, 30), 0),
+                (datetime.time(7, 30), 1),
+                (datetime.time(14, 0), 1),
+            ],
+        )
+
+    def test_next_bus_api_skips_database(self):
+        """The JSON endpoint answers from the index without querying."""
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse("next_bus_json"), {"route": self.route.id, "k": 2}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["departures"]), 2)
+
+    def test_index_follows_deletes(self):
+        """Deleting a schedule rebuilds the index after commit."""
+        with self.captureOnCommitCallbacks(execute=True):
+            BusSchedule.objects.filter(departure_time=datetime.time(16, 30)).delete()
+        result = next_departures(self.route.id, datetime.time(15, 0), k=1)
+        self.assertEqual(result["departures"][0]["departure"], datetime.time(7, 30))
+
+    def test_bulk_delete_rebuilds_index_once(self):
+        """A queryset delete of many rows queues a single rebuild."""
+        with mock.patch(
+            "services.departures.rebuild_departure_index"
+        ) as rebuild, self.captureOnCommitCallbacks(execute=True):
+            BusSchedule.objects.filter(route=self.route).delete()
+        rebuild.assert_called_once_with()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BusSchedule.objects.create(
+                route=self.route,
+                departure_time=datetime.time(9, 0),
+                arrival_time=datetime.time(9, 45),
+            )
+        result = next_departures(self.route.id, datetime.time(8, 0), k=3)
+        self.assertEqual(len(result["departures"]), 1)
+
+
+class LiveHubTest(TestCase):
+    async def test_publish_reaches_subscriber(self):
+        """Published events are delivered to each connected queue."""
+        live_hub = LiveHub(max_queue=4)
+        queue = live_hub.subscribe()
+        live_hub.publish("bus_schedule", {"id": 1})
+        message = await asyncio.wait_for(queue.get(), timeout=1)
+        self.assertEqual(message, {"event": "bus_schedule", "data": {"id": 1}})
+        live_hub.unsubscribe(queue)
+        self.assertEqual(live_hub.subscriber_count(), 0)
+
+    async def test_slow_client_queue_is_bounded(self):
+        """A client that stops reading keeps only the newest events."""
+        live_hub = LiveHub(max_queue=2)
+        queue = live_hub.subscribe()
+        for i in range(5):
+            live_hub.publish("cafeteria_menu", {"id": i})
+        await asyncio.sleep(0)
+        self.assertEqual(queue.qsize(), 2)
+        self.assertEqual((await queue.get())["data"]["id"], 3)
+
+    def test_stream_is_disabled_under_wsgi(self):
+        """WSGI requests get 204 and pages do not open an EventSource."""
+        response = self.client.get(reverse("live_updates"))
+        self.assertEqual(response.status_code, 204)
+        self.assertNotContains(self.client.get(reverse("bus_schedules")), "EventSource")
+
+    async def test_stream_serves_asgi_requests(self):
+        response = await self.async_client.get(reverse("live_updates"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+        await chunks.aclose()
+
+    def test_menu_save_publishes_event(self):
+        """Saving a menu publishes to the shared hub after commit."""
+        with mock.patch.object(live_hub_module.hub, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                CafeteriaMenu.objects.create(
+                    day=datetime.date(2026, 9, 1),
+                    meal_type="Lunch",
+                    description="Beef Tehari",
+                    price=160,
+                )
+        publish.assert_called_once()
+        self.assertEqual(publish.call_args.args[0], "cafeteria_menu")
+
+
+class MealHeadcountTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="eater", password="password123")
+        self.day = datetime.date(2026, 9, 1)
+
+    def counts(self):
+        return dict(
+            ((day, meal), count)
+            for day, meal, count in MealHeadcount.objects.exclude(count=0).values_list(
+                "day", "meal", "count"
+            )
+        )
+
+    def test_create_edit_delete_keep_rollup_in_sync(self):
+        """Range add/remove on every booking change matches a full rebuild."""
+        booking = MealBooking.objects.create(
+            user=self.user,
+            date_from=self.day,
+            date_to=self.day + datetime.timedelta(days=2),
+            lunch=True,
+        )
+        MealBooking.objects.create(
+            user=self.user,
+            date_from=self.day + datetime.timedelta(days=1),
+            date_to=self.day + datetime.timedelta(days=1),
+            lunch=True,
+            dinner=True,
+        )
+        second_day = self.day + datetime.timedelta(days=1)
+        self.assertEqual(self.counts()[(second_day, "lunch")], 2)
+
+        booking.date_to = self.day
+        booking.breakfast = True
+        booking.save()
+        incremental = self.counts()
+        self.assertEqual(incremental[(self.day, "breakfast")], 1)
+        self.assertNotIn((self.day + datetime.timedelta(days=2), "lunch"), incremental)
+
+        call_command("rebuild_headcounts", stdout=StringIO())
+        self.assertEqual(self.counts(), incremental)
+
+        MealBooking.objects.all().delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_kitchen_report(self):
+        """Staff get zero-filled per-day plate counts for the window."""
+        staff = User.objects.create_user(
+            username="chef", password="password123", is_staff=True
+        )
+        MealBooking.objects.create(
+            user=self.user, date_from=self.day, date_to=self.day, dinner=True
+        )
+        self.client.force_login(staff)
+        response = self.client.get(
+            reverse("kitchen_headcount_report"),
+            {"from": "2026-09-01", "to": "2026-09-02"},
+        )
+        self.assertEqual(
+            response.json()["days"],
+            [
+                {"day": "2026-09-01", "breakfast": 0, "lunch": 0, "dinner": 1},
+                {"day": "2026-09-02", "breakfast": 0, "lunch": 0, "dinner": 0},
+            ],
+        )
+
+
+class MealQRTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="eater", password="password123")
+        self.booking = MealBooking.objects.create(
+            user=self.user,
+            date_from=datetime.date(2026, 9, 1),
+            date_to=datetime.date(2026, 9, 5),
+            lunch=True,
+        )
+        self.client.force_login(self.user)
+
+    def test_signed_token_round_trip(self):
+        """Tokens carry only the booking id and reject tampering."""
+        token = booking_token(self.booking.id)
+        self.assertEqual(booking_id_from_token(token), self.booking.id)
+        self.assertIsNone(booking_id_from_token("9" + token))
+
+    def test_qr_served_with_etag(self):
+        """QR images are cacheable and revalidate with 304."""
+        url = reverse("booking_qr", args=[self.booking.id])
+        response = self.client.get(url, {"format": "svg"})
+        self.assertEqual(response["Content-Type"], "image/svg+xml")
+        self.assertIn("private", response["Cache-Control"])
+
+        response = self.client.get(
+            url, {"format": "svg"}, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_qr_hidden_from_other_students(self):
+        """Students cannot fetch QR codes for someone else's booking."""
+        other = User.objects.create_user(username="other", password="password123")
+        self.client.force_login(other)
+        response = self.client.get(reverse("booking_qr", args=[self.booking.id]))
+        self.assertEqual(response.status_code, 404)
+
+
+class MealRedemptionTest(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(username="eater", password="password123")
+        self.booking = MealBooking.objects.create(
+            user=self.student,
+            date_from=datetime.date(2026, 9, 1),
+            date_to=datetime.date(2026, 9, 5),
+            lunch=True,
+        )
+        self.token = booking_token(self.booking.id)
+
+    def test_redeem_marks_meal_once(self):
+        """A booked meal is served once; the second scan is a duplicate."""
+        day = datetime.date(2026, 9, 2)
+        self.assertEqual(redeem(self.token, day, "lunch")["status"], "success")
+        self.assertEqual(redeem(self.token, day, "lunch")["status"], "duplicate")
+        self.assertEqual(MealRedemption.objects.count(), 1)
+
+    def test_redeem_rejects_unbooked_meal_and_day(self):
+        """Meals outside the booking are refused."""
+        self.assertEqual(
+            redeem(self.token, datetime.date(2026, 9, 2), "dinner")["status"], "error"
+        )
+        self.assertEqual(
+            redeem(self.token, datetime.date(2026, 9, 9), "lunch")["status"], "error"
+        )
+
+    def test_verify_endpoint_requires_staff_and_post(self):
+        """The scanner endpoint is routed, staff-only and POST-only."""
+        url = reverse("verify_meal_qr")
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.post(url, {"data": self.token}).status_code, 302)
+
+        staff = User.objects.create_user(
+            username="cashier", password="password123", is_staff=True
+        )
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).status_code, 405)
+        response = self.client.post(url, {"data": "garbage", "meal": "lunch"})
+        self.assertEqual(response.status_code, 400)
+
+
+class MealBatchRedemptionTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            username="cashier", password="password123", is_staff=True
+        )
+        self.bookings = [
+            MealBooking.objects.create(
+                user=User.objects.create_user(username=f"s{i}", password="password123"),
+                date_from=datetime.date(2026, 9, 1),
+                date_to=datetime.date(2026, 9, 5),
+                lunch=True,
+            )
+            for i in range(3)
+        ]
+        self.client.force_login(self.staff)
+
+    def post_batch(self, station, scans):
+        return self.client.post(
+            reverse("redeem_meal_batch"),
+            data=json.dumps({"station": station, "scans": scans}),
+            content_type="application/json",
+        )
+
+    def test_batch_reports_per_scan_results(self):
+        """One flush applies all scans and flags cross-station conflicts."""
+        noon = "2026-09-02T12:00:00+06:00"
+        scans = [
+            {"id": i, "data": booking_token(b.id), "meal": "lunch", "scanned_at": noon}
+            for i, b in enumerate(self.bookings)
+        ]
+        scans.append({"id": "bad", "data": "forged", "scanned_at": noon})
+        response = self.post_batch("Counter A", scans)
+        statuses = [r["status"] for r in response.json()["results"]]
+        self.assertEqual(statuses, ["success", "success", "success", "error"])
+        self.assertEqual(MealRedemption.objects.count(), 3)
+
+        # Re-sending the same batch is idempotent
+        response = self.post_batch("Counter A", scans[:1])
+        self.assertEqual(response.json()["results"][0]["status"], "success")
+
+        scans[0]["scanned_at"] = "2026-09-02T12:05:00+06:00"
+        response = self.post_batch("Counter B", scans[:1])
+        self.assertEqual(response.json()["results"][0]["status"], "conflict")
+        self.assertEqual(MealRedemption.objects.count(), 3)
+
+    def test_same_plate_twice_in_batch(self):
+        """The earliest scan in a batch wins; later ones are duplicates."""
+        token = booking_token(self.bookings[0].id)
+        response = self.post_batch(
+            "Counter A",
+            [
+                {"id": 1, "data": token, "scanned_at": "2026-09-02T12:10:00+06:00"},
+                {"id": 2, "data": token, "scanned_at": "2026-09-02T12:00:00+06:00"},
+            ],
+        )
+        statuses = [r["status"] for r in response.json()["results"]]
+        self.assertEqual(statuses, ["duplicate", "success"])
+
+
+@override_settings(PAYMENT_VALIDATOR="services.payments.LocalGatewayStandIn")
+class PaymentPipelineTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="payer", password="password123")
+        self.wallet = self.user.studentwallet
+        self.payload = {
+            "tran_id": "TXN-1001",
+            "val_id": "VAL-1",
+            "amount": "250.00",
+            "status": "VALID",
+            "value_a": str(self.wallet.pk),
+        }
+
+    def test_duplicate_ipn_credits_once(self):
+        """Gateway retries are absorbed by the inbox's unique tran_id."""
+        url = reverse("payment_ipn")
+        first = self.client.post(url, self.payload).json()
+        second = self.client.post(url, self.payload).json()
+        self.assertEqual((first["status"], second["status"]), ("accepted", "duplicate"))
+
+        # The request path never touches the balance
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("500.00"))
+
+        call_command("process_payments", stdout=StringIO())
+        call_command("process_payments", stdout=StringIO())
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("750.00"))
+        self.assertEqual(PaymentCallback.objects.get().status, "credited")
+
+    def test_invalid_callback_rejected(self):
+        """Callbacks the gateway does not confirm are never credited."""
+        self.payload["status"] = "FAILED"
+        record_callback(self.payload)
+        process_pending_callbacks()
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("500.00"))
+        self.assertEqual(PaymentCallback.objects.get().status, "rejected")
+
+    def test_forged_callback_cannot_redirect_top_up(self):
+        """The wallet and amount come from the gateway, not the IPN body."""
+        attacker = User.objects.create_user(username="mallory", password="pw")
+        verified = {"amount": Decimal("250.00"), "value_a": str(self.wallet.pk)}
+        validator = mock.Mock()
+        validator.validate.return_value = (True, verified, "Validated")
+
+        record_callback(dict(self.payload, value_a=str(attacker.studentwallet.pk)))
+        process_pending_callbacks(validator=validator)
+        callback = PaymentCallback.objects.get()
+        self.assertEqual(callback.status, "rejected")
+        self.assertIn("value_a", callback.note)
+        attacker.studentwallet.refresh_from_db()
+        self.assertEqual(attacker.studentwallet.balance, Decimal("500.00"))
+
+        callback.delete()
+        record_callback(dict(self.payload, amount="9999.00"))
+        process_pending_callbacks(validator=validator)
+        self.assertEqual(PaymentCallback.objects.get().status, "rejected")
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("500.00"))
+
+    @override_settings(PAYMENT_MAX_ATTEMPTS=2, PAYMENT_CLAIM_SECONDS=0)
+    def test_unreachable_gateway_marks_callback_failed(self):
+        """Callbacks give up after the last attempt instead of staying pending."""
+        from .payments import GatewayUnavailable
+
+        validator = mock.Mock()
+        validator.validate.side_effect = GatewayUnavailable("timeout")
+        record_callback(self.payload)
+        self.assertEqual(process_pending_callbacks(validator=validator), 1)
+        self.assertEqual(PaymentCallback.objects.get().status, "pending")
+        self.assertEqual(process_pending_callbacks(validator=validator), 1)
+        callback = PaymentCallback.objects.get()
+        self.assertEqual((callback.status, callback.attempts), ("failed", 2))
+        self.assertEqual(process_pending_callbacks(validator=validator), 0)
+
+    def test_success_page_refresh_does_not_credit(self):
+        """The browser landing page only reports the inbox status."""
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("payment_success"), self.payload)
+        self.assertEqual(response.context["status"], "Processing")
+        process_pending_callbacks()
+        response = self.client.get(reverse("payment_success"), {"tran_id": "TXN-1001"})
+        self.assertEqual(response.context["status"], "Success")
+        self.client.post(reverse("payment_success"), self.payload)
+        process_pending_callbacks()
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("750.00"))
+
+
+class TransactionHistoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="saver", password="password123")
+        self.wallet = self.user.studentwallet
+        # Drop the signup bonus so the history is exactly the rows below
+        Transaction.objects.filter(wallet=self.wallet).delete()
+        Transaction.objects.bulk_create(
+            Transaction(
+                wallet=self.wallet,
+                amount=Decimal("10.00"),
+                tx_type="Debit" if i % 3 else "Credit",
+                description=f"Entry {i}",
+            )
+            for i in range(60)
+        )
+        # Identical timestamps force the id tie-breaker to do the work
+        Transaction.objects.update(timestamp=timezone.now())
+        self.client.force_login(self.user)
+
+    def walk(self, **params):
+        seen, cursor = [], None
+        while True:
+            query = dict(params, limit=25)
+            if cursor:
+                query["cursor"] = cursor
+            data = self.client.get(reverse("transaction_history_json"), query).json()
+            seen += [row["id"] for row in data["transactions"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                return seen
+
+    def test_cursor_walk_visits_every_row_once(self):
+        """Following next_cursor returns each transaction exactly once, newest first."""
+        seen = self.walk()
+        self.assertEqual(len(seen), 60)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_type_filter(self):
+        """The tx_type filter paginates within the same ordering."""
+        self.assertEqual(len(self.walk(type="Credit")), 20)
+
+    def test_naive_cursor_is_rejected(self):
+        """A hand-made cursor without a UTC offset is a 400, not a crash."""
+        cursor = encode_cursor(datetime.datetime(2026, 1, 1, 12, 0), 1)
+        response = self.client.get(
+            reverse("transaction_history_json"), {"cursor": cursor}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_history_page_is_bounded(self):
+        """The HTML page renders one page and links to older rows."""
+        response = self.client.get(reverse("transaction_history"))
+        self.assertEqual(len(response.context["transactions"]), 25)
+        self.assertIsNotNone(response.context["next_cursor"])
+
+
+class MonthlyRollupTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="diner", password="password123")
+        self.wallet = self.user.studentwallet
+
+    def test_rollup_tracks_ledger_and_matches_backfill(self):
+        """Each insert updates its month; the backfill reproduces the same rows."""
+        ledger.apply(self.wallet.pk, "300.00", ledger.CREDIT)
+        ledger.apply(self.wallet.pk, "120.00", ledger.DEBIT)
+        ledger.apply(self.wallet.pk, "80.00", ledger.DEBIT)
+
+        # The 500.00 signup bonus is the month's first credit
+        month = month_start(timezone.now())
+        summary = monthly_summary(self.wallet.pk, month)
+        self.assertEqual(
+            (summary.credit_total, summary.credit_count), (Decimal("800.00"), 2)
+        )
+        self.assertEqual(
+            (summary.debit_total, summary.debit_count), (Decimal("200.00"), 2)
+        )
+
+        call_command("backfill_monthly_rollups", stdout=StringIO())
+        rebuilt = monthly_summary(self.wallet.pk, month)
+        self.assertEqual(rebuilt.debit_total, Decimal("200.00"))
+        self.assertEqual(rebuilt.credit_count, 2)
+
+    def test_month_bounds_are_half_open_local_months(self):
+        """December rolls into January of the next year."""
+        start, end = month_bounds(datetime.date(2026, 12, 1))
+        self.assertEqual(timezone.localtime(start).date(), datetime.date(2026, 12, 1))
+        self.assertEqual(timezone.localtime(end).date(), datetime.date(2027, 1, 1))
+
+    def test_meal_summary_pdf_is_cached_until_new_debit(self):
+        """Repeat downloads reuse the rendered file until a newer debit lands."""
+        ledger.apply(self.wallet.pk, "150.00", ledger.DEBIT, description="Lunch")
+        self.client.force_login(self.user)
+        url = reverse("download_meal_summary")
+
+        with tempfile.TemporaryDirectory() as cache_dir, self.settings(
+            STATEMENT_CACHE_DIR=cache_dir
+        ), mock.patch(
+            "services.utils.generate_meal_pdf", wraps=utils.generate_meal_pdf
+        ) as render:
+            response = self.client.get(url)
+            self.assertEqual(response["Content-Type"], "application/pdf")
+            self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+            response.close()
+            self.client.get(url).close()
+            self.assertEqual(render.call_count, 1)
+
+            ledger.apply(self.wallet.pk, "60.00", ledger.DEBIT, description="Snacks")
+            self.client.get(url).close()
+            self.assertEqual(render.call_count, 2)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+    def test_stale_statement_download_survives_newer_render(self):
+        """A handle taken before a newer version unlinks the file still reads."""
+        month = datetime.date(2026, 9, 1)
+        with tempfile.TemporaryDirectory() as cache_dir, self.settings(
+            STATEMENT_CACHE_DIR=cache_dir
+        ):
+            with utils.cached_meal_statement(self.user, month, 1, [], 0) as old:
+                utils.cached_meal_statement(self.user, month, 2, [], 0).close()
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+                self.assertTrue(old.read().startswith(b"%PDF"))
+
+
+class StatementExportTest(TestCase):
+    def test_export_writes_one_statement_per_wallet(self):
+        """Every wallet gets a PDF in the archive, including idle ones."""
+        for name in ("alpha", "beta", "gamma"):
+            User.objects.create_user(username=name, password="password123")
+        wallet = User.objects.get(username="alpha").studentwallet
+        ledger.apply(wallet.pk, "45.00", ledger.DEBIT, description="Breakfast")
+        month = timezone.localdate().strftime("%Y-%m")
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            archive_path = os.path.join(out_dir, "statements.zip")
+            call_command(
+                "export_statements",
+                month=month,
+                output=archive_path,
+                workers=1,
+                shard_size=2,
+                stdout=StringIO(),
+            )
+            with zipfile.ZipFile(archive_path) as archive:
+                names = sorted(archive.namelist())
+                self.assertTrue(archive.read(names[0]).startswith(b"%PDF"))
+
+        wallet_ids = StudentWallet.objects.order_by("user__username").values_list(
+            "id", flat=True
+        )
+        self.assertEqual(
+            names,
+            sorted(
+                f"Meal_Summary_{pk}_{name}.pdf"
+                for pk, name in zip(wallet_ids, ("alpha", "beta", "gamma"))
+            ),
+        )
+
+    def test_usernames_cannot_escape_the_output_directory(self):
+        """Path characters in a username never reach the file name."""
+        for name in ("../evil", "..", "a/b"):
+            User.objects.create_user(username=name, password="password123")
+
+        with tempfile.TemporaryDirectory() as root:
+            out_dir = os.path.join(root, "statements")
+            call_command(
+                "export_statements",
+                output=out_dir,
+                workers=1,
+                stdout=StringIO(),
+            )
+            self.assertEqual(os.listdir(root), ["statements"])
+            names = os.listdir(out_dir)
+
+        self.assertEqual(len(names), 3)
+        self.assertTrue(all("/" not in n and ".." not in n for n in names))
+
+
+class WalletReconciliationTest(TestCase):
+    def test_reconcile_reports_only_drifted_wallets(self):
+        """Ledger-backed balances pass; a balance edited behind the ledger is reported."""
+        for name in ("north", "south", "east"):
+            User.objects.create_user(username=name, password="password123")
+        north = User.objects.get(username="north").studentwallet
+        south = User.objects.get(username="south").studentwallet
+        ledger.apply(north.pk, "120.00", ledger.DEBIT, description="Lunch")
+        StudentWallet.objects.filter(pk=south.pk).update(balance=Decimal("450.00"))
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            report = os.path.join(out_dir, "mismatches.csv")
+            call_command(
+                "reconcile_wallets",
+                report=report,
+                workers=1,
+                chunk_size=2,
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+            with open(report) as handle:
+                rows = list(csv.DictReader(handle))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["username"], "south")
+        self.assertEqual(rows[0]["difference"], "-50.00")
+
+
+class TransactionArchiveTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="elder", password="password123")
+        self.wallet = self.user.studentwallet
+        for amount in ("40.00", "60.00"):
+            ledger.apply(self.wallet.pk, amount, ledger.DEBIT, description="Dinner")
+        # Move the signup bonus and both debits back into March 2025
+        march = timezone.make_aware(datetime.datetime(2025, 3, 10, 12, 0))
+        Transaction.objects.filter(wallet=self.wallet).update(timestamp=march)
+        call_command("backfill_monthly_rollups", stdout=StringIO())
+        ledger.apply(self.wallet.pk, "25.00", ledger.DEBIT, description="Lunch")
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_dir.cleanup)
+
+    def test_archive_leaves_checkpoint_and_reads_back(self):
+        """Archived rows leave the hot table, yet history and statements still find them."""
+        with self.settings(TRANSACTION_ARCHIVE_DIR=self.archive_dir.name):
+            call_command("archive_transactions", before="2025-04", stdout=StringIO())
+
+            checkpoint = Transaction.objects.get(wallet=self.wallet, tx_type="Checkpoint")
+            self.assertEqual(checkpoint.amount, Decimal("400.00"))
+            self.assertEqual(Transaction.objects.filter(wallet=self.wallet).count(), 2)
+
+            # Balance still equals the hot table, and March's rollup survives
+            out = StringIO()
+            call_command("reconcile_wallets", workers=1, stdout=out, stderr=StringIO())
+            self.assertIn("0 mismatched", out.getvalue())
+            call_command("backfill_monthly_rollups", stdout=StringIO())
+            march = monthly_summary(self.wallet.pk, datetime.date(2025, 3, 1))
+            self.assertEqual(march.debit_total, Decimal("100.00"))
+
+            self.client.force_login(self.user)
+            data = self.client.get(
+                reverse("transaction_history_json"),
+                {"month": "2025-03", "type": "Debit"},
+            ).json()
+            self.assertEqual(
+                [row["amount"] for row in data["transactions"]], ["60.00", "40.00"]
+            )
+            page = self.client.get(reverse("transaction_history"), {"month": "2025-03"})
+            self.assertContains(page, "Initial Signup Bonus")
+
+            with tempfile.TemporaryDirectory() as cache_dir, self.settings(
+                STATEMENT_CACHE_DIR=cache_dir
+            ):
+                response = self.client.get(
+                    reverse("download_meal_summary"), {"month": "2025-03"}
+                )
+                self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+                response.close()
+
+
+class StaffExportTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            username="bursar", password="password123", is_staff=True
+        )
+        self.student = User.objects.create_user(username="payer", password="password123")
+        wallet_id = self.student.studentwallet.pk
+        ledger.apply(wallet_id, "30.00", ledger.DEBIT, description="Tea")
+
+    def test_exports_are_staff_only(self):
+        """Students are sent to the admin login instead of getting data."""
+        self.client.force_login(self.student)
+        response = self.client.get(reverse("staff_export", args=["transactions"]))
+        self.assertEqual(response.status_code, 302)
+
+    def test_transaction_csv_applies_type_filter(self):
+        """The CSV export streams only rows of the requested type."""
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse("staff_export", args=["transactions"]), {"type": "Debit"}
+        )
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(
+            (rows[0]["wallet_user_username"], rows[0]["amount"]), ("payer", "30.00")
+        )
+
+    def test_ndjson_exports_and_bad_filters(self):
+        """NDJSON emits one object per line; malformed filters are rejected."""
+        self.client.force_login(self.staff)
+        today = timezone.localdate().isoformat()
+        response = self.client.get(
+            reverse("staff_export", args=["wallets"]),
+            {"format": "ndjson", "from": today, "to": today},
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        balances = {row["user_username"]: row["balance"] for row in rows}
+        self.assertEqual(balances, {"bursar": "500.00", "payer": "470.00"})
+
+        for params in ({"from": "not-a-date"}, {"format": "xml"}, {"type": "lunch"}):
+            response = self.client.get(
+                reverse("staff_export", args=["transactions"]), params
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class FlakySMSBackend(sms.LocalSMSBackend):
+    """Fails the first send with a provider outage, then delivers."""
+
+    failures = 1
+
+    def send(self, phone, body):
+        if FlakySMSBackend.failures:
+            FlakySMSBackend.failures -= 1
+            raise sms.TransientSMSError("503 Service Unavailable")
+        super().send(phone, body)
+
+
+@override_settings(
+    SMS_BACKEND="services.sms.LocalSMSBackend",
+    SMS_COALESCE_SECONDS=60,
+    SMS_RETRY_BACKOFF_SECONDS=0,
+)
+class SMSDispatchTest(TestCase):
+    def setUp(self):
+        sms.LocalSMSBackend.outbox.clear()
+        self.addCleanup(sms.flush_sms)
+
+    def test_burst_to_one_number_is_coalesced(self):
+        """Alerts queued inside the window leave as one message per number."""
+        sms.queue_wallet_alert("+8801700000001", "100.00", "600.00")
+        sms.queue_wallet_alert("+8801700000001", "50.00", "650.00")
+        sms.queue_wallet_alert("+8801700000002", "20.00", "520.00")
+        self.assertEqual(sms.LocalSMSBackend.outbox, [])
+
+        self.assertEqual(sms.flush_sms(), 2)
+        bodies = dict(sms.LocalSMSBackend.outbox)
+        self.assertIn("৳150.00 has been credited", bodies["+8801700000001"])
+        self.assertIn("(2 top-ups)", bodies["+8801700000001"])
+        self.assertIn("New Balance: ৳650.00", bodies["+8801700000001"])
+
+    @override_settings(SMS_BACKEND="services.tests.FlakySMSBackend")
+    def test_transient_failure_is_retried(self):
+        """A provider outage is retried with backoff instead of dropping the alert."""
+        FlakySMSBackend.failures = 1
+        sms.queue_wallet_alert("+8801700000003", "10.00", "510.00")
+        self.assertEqual(sms.flush_sms(), 1)
+        self.assertEqual(len(sms.LocalSMSBackend.outbox), 1)
+
+    @override_settings(
+        SMS_BACKEND="services.tests.FlakySMSBackend", SMS_MAX_ATTEMPTS=2
+    )
+    def test_exhausted_retries_are_logged(self):
+        """Giving up is reported through logging, not printed."""
+        FlakySMSBackend.failures = 2
+        sms.queue_wallet_alert("+8801700000005", "10.00", "510.00")
+        with self.assertLogs("services.sms", "WARNING") as logs:
+            self.assertEqual(sms.flush_sms(), 0)
+        self.assertIn("failed after 2 attempts", logs.output[0])
+
+    @override_settings(
+        PAYMENT_VALIDATOR="services.payments.LocalGatewayStandIn",
+        SMS_COALESCE_SECONDS=0,
+    )
+    def test_credited_top_up_sends_alert(self):
+        """The payment worker queues the alert for the student's phone."""
+        user = User.objects.create_user(username="texter", password="password123")
+        Profile.objects.create(user=user, phone_number="+8801700000004")
+        record_callback(
+            {
+                "tran_id": "TXN-SMS",
+                "amount": "80.00",
+                "status": "VALID",
+                "value_a": str(user.studentwallet.pk),
+            }
+        )
+        process_pending_callbacks()
+        self.assertEqual(
+            [phone for phone, _ in sms.LocalSMSBackend.outbox], ["+8801700000004"]
+        )
+
+    @override_settings(PAYMENT_VALIDATOR="services.payments.LocalGatewayStandIn")
+    def test_payment_command_sends_alerts_before_exiting(self):
+        """A one-shot worker run does not leave alerts on the coalescing timer."""
+        user = User.objects.create_user(username="oneshot", password="password123")
+        Profile.objects.create(user=user, phone_number="+8801700000006")
+        record_callback(
+            {
+                "tran_id": "TXN-ONESHOT",
+                "amount": "40.00",
+                "status": "VALID",
+                "value_a": str(user.studentwallet.pk),
+            }
+        )
+        call_command("process_payments", stdout=StringIO())
+        self.assertEqual(
+            [phone for phone, _ in sms.LocalSMSBackend.outbox], ["+8801700000006"]
+        )
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class StudentImportTest(TestCase):
+    def test_import_creates_everything_a_signup_would(self):
+        """Imported students match signal-created ones: wallet, bonus, rollup, profile."""
+        User.objects.create_user(username="taken", password="password123")
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as handle:
+            handle.write(
+                "username,email,password,phone_number,date_of_birth\n"
+                "fresh1,f1@example.com,pass-one,+8801700000010,2004-05-06\n"
+                "fresh2,f2@example.com,pass-two,,\n"
+                "taken,t@example.com,pass-three,,\n"
+                "nopass,n@example.com,,,\n"
+            )
+        self.addCleanup(os.unlink, handle.name)
+
+        out = StringIO()
+        call_command(
+            "import_students",
+            handle.name,
+            workers=1,
+            batch_size=1,
+            stdout=out,
+            stderr=StringIO(),
+        )
+        self.assertIn("imported 2 students", out.getvalue())
+        self.assertIn("2 rows skipped", out.getvalue())
+
+        fresh = User.objects.get(username="fresh1")
+        self.assertTrue(fresh.check_password("pass-one"))
+        self.assertEqual(fresh.studentwallet.balance, Decimal("500.00"))
+        self.assertEqual(fresh.profile.date_of_birth, datetime.date(2004, 5, 6))
+        self.assertEqual(fresh.profile.phone_number, "+8801700000010")
+        summary = monthly_summary(fresh.studentwallet.pk, month_start(timezone.now()))
+        self.assertEqual(summary.credit_total, Decimal("500.00"))
+
+        out = StringIO()
+        call_command("reconcile_wallets", workers=1, stdout=out, stderr=StringIO())
+        self.assertIn("0 mismatched", out.getvalue())
+
+
+class TimetableTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        faculty = Faculty.objects.create(
+            name="Dr. Rahman", email="rahman@example.com", department="CSE"
+        )
+        self.algorithms = Course.objects.create(
+            faculty=faculty, name="Algorithms", code="CSE301"
+        )
+        self.networks = Course.objects.create(
+            faculty=faculty, name="Networks", code="CSE305"
+        )
+        for course, day, start in (
+            (self.algorithms, "Monday", 9),
+            (self.algorithms, "Wednesday", 9),
+            (self.networks, "Monday", 11),
+        ):
+            ClassSchedule.objects.create(
+                course=course,
+                day_of_week=day,
+                start_time=datetime.time(start, 0),
+                end_time=datetime.time(start + 1, 30),
+            )
+        self.user = User.objects.create_user(username="learner", password="password123")
+        Enrollment.objects.create(user=self.user, course=self.algorithms)
+
+    def test_grid_lists_only_enrolled_classes(self):
+        """Only the student's courses appear, one column per distinct slot."""
+        grid = student_timetable(self.user)
+        self.assertEqual(grid["slots"], [("09:00", "10:30")])
+        self.assertEqual([row["day"] for row in grid["days"]], ["Monday", "Wednesday"])
+        self.assertEqual(grid["days"][0]["cells"][0][0]["code"], "CSE301")
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("class_schedules"))
+        self.assertContains(response, "CSE301")
+        self.assertNotContains(response, "CSE305")
+
+    def test_cache_expires_only_for_affected_students(self):
+        """Edits to other courses leave the grid cached; own-course edits rebuild it."""
+        student_timetable(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            ClassSchedule.objects.filter(course=self.networks).first().save()
+        with self.assertNumQueries(0):
+            student_timetable(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(user=self.user, course=self.networks)
+        grid = student_timetable(self.user)
+        self.assertEqual(grid["slots"], [("09:00", "10:30"), ("11:00", "12:30")])
+
+        monday = ClassSchedule.objects.get(course=self.algorithms, day_of_week="Monday")
+        monday.start_time = datetime.time(8, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            monday.save()
+        self.assertEqual(student_timetable(self.user)["slots"][0], ("08:00", "10:30"))
+
+
+class ScheduleConflictTest(TestCase):
+    def setUp(self):
+        self.rahman = Faculty.objects.create(
+            name="Dr. Rahman", email="rahman@example.com", department="CSE"
+        )
+        self.karim = Faculty.objects.create(
+            name="Dr. Karim", email="karim@example.com", department="EEE"
+        )
+        self.algorithms = Course.objects.create(
+            faculty=self.rahman, name="Algorithms", code="CSE301"
+        )
+        self.compilers = Course.objects.create(
+            faculty=self.rahman, name="Compilers", code="CSE401"
+        )
+        self.circuits = Course.objects.create(
+            faculty=self.karim, name="Circuits", code="EEE201"
+        )
+        ClassSchedule.objects.create(
+            course=self.algorithms,
+            day_of_week="Monday",
+            start_time=datetime.time(9, 0),
+            end_time=datetime.time(10, 30),
+            room="B-204",
+        )
+        self.staff = User.objects.create_user(
+            username="registrar", password="password123", is_staff=True
+        )
+        self.client.force_login(self.staff)
+
+    def post(self, course, start, end, room=""):
+        return self.client.post(
+            reverse("add_class_schedule"),
+            {
+                "course": course.pk,
+                "day_of_week": "Monday",
+                "start_time": start,
+                "end_time": end,
+                "room": room,
+            },
+            follow=True,
+        )
+
+    def test_add_rejects_faculty_and_room_double_booking(self):
+        """Same lecturer or same room at an overlapping time is refused."""
+        response = self.post(self.compilers, "10:00", "11:00", "C-101")
+        self.assertContains(response, "Faculty Dr. Rahman on Monday")
+
+        response = self.post(self.circuits, "09:30", "10:00", "B-204")
+        self.assertContains(response, "Room B-204 on Monday")
+        self.assertEqual(ClassSchedule.objects.count(), 1)
+
+        # A bad course id is a form error, not a server error
+        response = self.client.post(
+            reverse("add_class_schedule"), {"course": "abc"}, follow=True
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ClassSchedule.objects.count(), 1)
+
+        # Back-to-back slots touch but do not overlap
+        self.post(self.compilers, "10:30", "12:00", "B-204")
+        self.assertEqual(ClassSchedule.objects.count(), 2)
+
+    def test_add_rechecks_room_under_lock(self):
+        """A clash that appears after form validation is still refused."""
+        with mock.patch("services.forms.check_slot", return_value=[]):
+            response = self.post(self.circuits, "09:30", "10:00", "B-204")
+        self.assertContains(response, "Room B-204 on Monday")
+        self.assertEqual(ClassSchedule.objects.count(), 1)
+
+    def test_audit_matches_pairwise_comparison(self):
+        """The sweep reports exactly the pairs a brute-force scan finds."""
+        rng = random.Random(5)
+        courses = [self.algorithms, self.compilers, self.circuits]
+        for _ in range(60):
+            start = rng.randrange(8 * 60, 17 * 60, 15)
+            ClassSchedule.objects.create(
+                course=rng.choice(courses),
+                day_of_week=rng.choice(["Monday", "Tuesday"]),
+                start_time=datetime.time(start // 60, start % 60),
+                end_time=datetime.time((start + 75) // 60, (start + 75) % 60),
+                room=rng.choice(["", "B-204", "C-101"]),
+            )
+
+        rows = list(ClassSchedule.objects.select_related("course"))
+        expected = set()
+        for i, a in enumerate(rows):
+            for b in rows[i + 1 :]:
+                if a.day_of_week != b.day_of_week:
+                    continue
+                if a.start_time < b.end_time and b.start_time < a.end_time:
+                    if a.course.faculty_id == b.course.faculty_id:
+                        expected.add(("faculty", frozenset((a.pk, b.pk))))
+                    if a.room and a.room == b.room:
+                        expected.add(("room", frozenset((a.pk, b.pk))))
+
+        found = {
+            (c.kind, frozenset((c.first.id, c.second.id))) for c in audit_conflicts()
+        }
+        self.assertEqual(found, expected)
+        out = StringIO()
+        call_command("audit_timetable", stdout=out, stderr=StringIO())
+        self.assertEqual(len(out.getvalue().splitlines()), len(expected))
+
+
+class TimetableGenerationTest(TestCase):
+    def setUp(self):
+        for i in range(3):
+            faculty = Faculty.objects.create(
+                name=f"Lecturer {i}", email=f"l{i}@example.com", department="CSE"
+            )
+            for j in range(3):
+                Course.objects.create(
+                    faculty=faculty, name=f"Course {i}{j}", code=f"CSE{i}{j}"
+                )
+
+    def test_generated_timetable_has_no_clashes(self):
+        """Every course gets its sessions and the audit finds no overlaps."""
+        options = dict(
+            rooms="A-101,A-102",
+            days="Sunday,Monday,Tuesday",
+            seed=3,
+            stdout=StringIO(),
+        )
+        call_command("generate_timetable", dry_run=True, **options)
+        self.assertFalse(ClassSchedule.objects.exists())
+
+        out = StringIO()
+        options["stdout"] = out
+        call_command("generate_timetable", **options)
+        self.assertIn("0 clashing sessions left", out.getvalue())
+        self.assertEqual(ClassSchedule.objects.count(), 18)
+        self.assertEqual(audit_conflicts(), [])
+        for course in Course.objects.all():
+            days = set(
+                ClassSchedule.objects.filter(course=course).values_list(
+                    "day_of_week", flat=True
+                )
+            )
+            self.assertEqual(len(days), 2)
+
+        # A rerun only schedules courses that have no slots yet
+        Course.objects.create(
+            faculty=Faculty.objects.first(), name="Seminar", code="CSE99"
+        )
+        call_command("generate_timetable", **options)
+        self.assertEqual(ClassSchedule.objects.count(), 20)
+        self.assertEqual(audit_conflicts(), [])
+
+    def test_unavoidable_clashes_are_not_written(self):
+        """Nine sessions cannot share one room's two periods, so nothing is saved."""
+        options = dict(
+            rooms="A-101",
+            days="Sunday",
+            day_start=datetime.time(8, 0),
+            day_end=datetime.time(11, 30),
+            sessions=1,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        with self.assertRaisesMessage(CommandError, "nothing was written"):
+            call_command("generate_timetable", **options)
+        self.assertFalse(ClassSchedule.objects.exists())
+
+        call_command("generate_timetable", allow_clashes=True, **options)
+        self.assertEqual(ClassSchedule.objects.count(), 9)
+
+
+class CalendarFeedTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="cal", password="pw")
+        faculty = Faculty.objects.create(
+            name="Dr. Rahman", email="r@example.com", department="CSE"
+        )
+        self.course = Course.objects.create(
+            faculty=faculty, name="Algorithms, Part I", code="CSE221"
+        )
+        ClassSchedule.objects.create(
+            course=self.course,
+            day_of_week="Tuesday",
+            start_time=datetime.time(10, 0),
+            end_time=datetime.time(11, 30),
+            room="A-101",
+        )
+        Enrollment.objects.create(user=self.user, course=self.course)
+        route = BusRoute.objects.create(
+            route_name="Uttara", start_location="Uttara", end_location="Campus"
+        )
+        BusSchedule.objects.create(
+            route=route,
+            departure_time=datetime.time(7, 30),
+            arrival_time=datetime.time(8, 15),
+        )
+        route.subscribers.add(self.user)
+        Event.objects.create(
+            event_name="Hackathon",
+            event_date=timezone.now(),
+            description="All night",
+        )
+        self.url = reverse("calendar_feed", args=[feed_token(self.user)])
+
+    def test_feed_contents_and_conditional_get(self):
+        """Repeat polls get 304; any change to the feed's data yields a new ETag."""
+        with self.settings(CALENDAR_TERM_START="2026-01-01"):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+            body = response.content.decode()
+            self.assertIn("DTSTART:20260106T100000\r\n", body)  # first Tuesday
+            self.assertIn("RRULE:FREQ=WEEKLY;COUNT=16\r\n", body)
+            self.assertIn("SUMMARY:CSE221: Algorithms\\, Part I\r\n", body)
+            self.assertIn("SUMMARY:Bus: Uttara\r\n", body)
+            self.assertIn("SUMMARY:Hackathon\r\n", body)
+            etag = response["ETag"]
+            self.assertFalse(etag.startswith("W/"))
+            self.assertIn("Last-Modified", response)
+
+            with self.assertNumQueries(3):
+                cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(cached.status_code, 304)
+            cached = self.client.get(
+                self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+            )
+            self.assertEqual(cached.status_code, 304)
+
+            ClassSchedule.objects.update(room="B-202")  # no signal, no new version
+            self.assertEqual(
+                self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+            )
+            self.course.name = "Algorithms"
+            self.course.save()
+            changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(changed.status_code, 200)
+            self.assertNotEqual(changed["ETag"], etag)
+
+            # Unsubscribing changes this user's feed only
+            etag = changed["ETag"]
+            self.user.bus_subscriptions.clear()
+            changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(changed.status_code, 200)
+            self.assertNotIn("Bus: Uttara", changed.content.decode())
+
+        self.assertEqual(self.client.get("/calendar/1:forged.ics").status_code, 404)
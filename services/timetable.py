@@ -0,0 +1,81 @@
+# services/timetable.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import ClassSchedule, Enrollment, Faculty
+
+DAY_ORDER = [day for day, _ in ClassSchedule.DAYS]
+
+
+def _cache_key(user_id):
+    return f"timetable:{user_id}"
+
+
+def build_timetable(user_id):
+    """
+    Compiles a student's week into a compact day x slot grid.
+
+    Slots are the distinct (start, end) pairs of the student's own classes, so
+    the grid has only the columns that student needs. Each cell is a list,
+    which stays empty for a free slot and has two entries for a clash.
+    """
+    rows = (
+        ClassSchedule.objects.filter(course__enrollments__user_id=user_id)
+        .values_list(
+            "day_of_week", "start_time", "end_time", "course__code", "course__name"
+        )
+        .order_by("start_time", "end_time", "course__code")
+    )
+    slots, classes = [], []
+    for day, start, end, code, name in rows:
+        slot = (start.strftime("%H:%M"), end.strftime("%H:%M"))
+        if slot not in slots:
+            slots.append(slot)
+        classes.append((day, slot, {"code": code, "name": name}))
+
+    grid = {}
+    for day, slot, entry in classes:
+        cells = grid.setdefault(day, [[] for _ in slots])
+        cells[slots.index(slot)].append(entry)
+
+    faculty = list(
+        Faculty.objects.filter(course__enrollments__user_id=user_id)
+        .distinct()
+        .order_by("name")
+        .values("name", "department", "email")
+    )
+    return {
+        "slots": slots,
+        "days": [{"day": day, "cells": grid[day]} for day in DAY_ORDER if day in grid],
+        "faculty": faculty,
+    }
+
+
+def student_timetable(user):
+    """Returns the cached grid for `user`, building it on a miss."""
+    key = _cache_key(user.pk)
+    timetable = cache.get(key)
+    if timetable is None:
+        timetable = build_timetable(user.pk)
+        cache.set(key, timetable, settings.TIMETABLE_CACHE_SECONDS)
+    return timetable
+
+
+def expire_timetables(user_ids=(), course_ids=()):
+    """
+    Drops cached grids for the given students and for everyone enrolled in
+    the given courses, once the change is committed so a concurrent rebuild
+    cannot re-cache the old rows.
+    """
+    user_ids = set(user_ids)
+    course_ids = list(course_ids)
+    if course_ids:
+        user_ids.update(
+            Enrollment.objects.filter(course_id__in=course_ids).values_list(
+                "user_id", flat=True
+            )
+        )
+    if user_ids:
+        keys = [_cache_key(user_id) for user_id in user_ids]
+        transaction.on_commit(lambda: cache.delete_many(keys))
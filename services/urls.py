@@ -15,13 +15,34 @@ urlpatterns = [
     ),
     path("meal-booking/", views.create_meal_booking, name="meal_booking"),
     path("booking-success/", views.booking_success_view, name="booking_success"),
+    path(
+        "meal-booking/<int:booking_id>/qr/",
+        views.booking_qr_view,
+        name="booking_qr",
+    ),
+    path("cafeteria/scanner/", views.cafeteria_scanner_view, name="cafeteria_scanner"),
+    path("verify-meal/", views.verify_meal_qr, name="verify_meal_qr"),
+    path("verify-meal/batch/", views.redeem_meal_batch, name="redeem_meal_batch"),
+    path(
+        "kitchen/headcount/",
+        views.kitchen_headcount_report,
+        name="kitchen_headcount_report",
+    ),
     # --- Transport & Bus Schedules ---
     path("bus-schedules/", views.bus_schedules_view, name="bus_schedules"),
+    path(
+        "bus-schedules/<int:route_id>/subscribe/",
+        views.toggle_route_subscription,
+        name="toggle_route_subscription",
+    ),
+    path("api/bus/next/", views.next_bus_json, name="next_bus_json"),
+    path("live/", views.live_updates, name="live_updates"),
     # --- Academics & Class Schedules ---
     path("schedule/", views.class_schedules_view, name="class_schedules"),
     path("add-schedule/", views.add_class_schedule, name="add_class_schedule"),
     # --- Events & Clubs ---
     path("events/", views.events_view, name="events"),
+    path("calendar/<str:token>.ics", views.calendar_feed, name="calendar_feed"),
     # --- Campus Navigation ---
     path("campus-map/", views.campus_map_view, name="campus_map"),
     path("api/buildings/", views.buildings_json, name="buildings_json"),
@@ -32,6 +53,13 @@ urlpatterns = [
     ),
     path("payment/initiate/", views.initiate_payment, name="initiate_payment"),
     path("payment/success/", views.payment_success, name="payment_success"),
+    path("payment/ipn/", views.payment_ipn, name="payment_ipn"),
     path("profile/update/", views.profile_update, name="profile_update"),
     path("wallet/history/", views.transaction_history, name="transaction_history"),
+    path(
+        "api/wallet/transactions/",
+        views.transaction_history_json,
+        name="transaction_history_json",
+    ),
+    path("staff/export/<str:dataset>/", views.staff_export, name="staff_export"),
 ]
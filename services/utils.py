@@ -1,15 +1,23 @@
 # services/utils.py
+import os
+import tempfile
 from io import BytesIO
+from pathlib import Path
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from datetime import datetime
-from twilio.rest import Client
 from django.conf import settings
 
 
-def generate_meal_pdf(user, transactions, total_spent):
-    """Generates a professional PDF report for student meal spending."""
-    buffer = BytesIO()
+def generate_meal_pdf(user, transactions, total_spent, output=None):
+    """
+    Generates a professional PDF report for student meal spending.
+
+    `transactions` is consumed once, row by row, so a queryset .iterator()
+    works. Pass a file path or file object as `output` to write straight to
+    disk; otherwise an in-memory buffer is returned.
+    """
+    buffer = BytesIO() if output is None else output
     p = canvas.Canvas(buffer, pagesize=letter)
     width, height = letter
 
@@ -55,24 +63,51 @@ def generate_meal_pdf(user, transactions, total_spent):
     p.showPage()
     p.save()
 
-    buffer.seek(0)
+    if output is None:
+        buffer.seek(0)
     return buffer
 
 
-def send_wallet_sms(user_phone, amount, new_balance):
-    """Sends a real-time SMS alert for wallet updates."""
-    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+def statement_cache_dir():
+    path = Path(settings.STATEMENT_CACHE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
 
-    message = (
-        f"Campus Wallet Alert: ৳{amount} has been credited to your account. "
-        f"New Balance: ৳{new_balance}. Stay secure!"
-    )
 
+def cached_meal_statement(user, month, version, transactions, total_spent):
+    """
+    Returns an open binary handle on the user's PDF statement for `month`,
+    rendering it only when no file exists for `version` (the newest
+    transaction id in the month). The file is opened here, so a concurrent
+    request that unlinks it as stale cannot break this download.
+    `transactions` may be a zero-argument callable so rows are only fetched
+    on a cache miss.
+    """
+    directory = statement_cache_dir()
+    prefix = f"{user.pk}-{month:%Y-%m}-"
+    path = directory / f"{prefix}{version or 0}.pdf"
+    try:
+        return open(path, "rb")
+    except FileNotFoundError:
+        pass
+
+    rows = transactions() if callable(transactions) else transactions
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            generate_meal_pdf(user, rows, total_spent, output=handle)
+        statement = open(tmp_path, "rb")
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
     try:
-        client.messages.create(
-            body=message,
-            from_=settings.TWILIO_PHONE_NUMBER,
-            to=user_phone,  # Ensure phone is in E.164 format (e.g., +8801...)
-        )
-    except Exception as e:
-        print(f"SMS Error: {e}")
+        os.replace(tmp_path, path)
+    except OSError:
+        # The open handle still serves this request; only the caching is lost
+        os.unlink(tmp_path)
+
+    # Older versions of this month's statement are stale now
+    for stale in directory.glob(f"{prefix}*.pdf"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return statement
@@ -3,43 +3,63 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate, logout, update_session_auth_hash
 from django.contrib.auth.forms import AuthenticationForm, PasswordChangeForm
 from django.contrib import messages
-from django.http import JsonResponse, FileResponse
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
 from collections import OrderedDict
 
 # import datetime
 
 from .models import (
     StudentWallet,
-    Transaction,
     Profile,
     CafeteriaMenu,
     BusRoute,
     BusSchedule,
-    Faculty,
     Course,
-    ClassSchedule,
+    Faculty,
     Club,
     Event,
     CampusBuilding,
     MealBooking,
+    MealHeadcount,
+    PaymentCallback,
 )
-from .forms import MealBookingForm, RegistrationForm
+from .forms import ClassScheduleForm, MealBookingForm, RegistrationForm
+from django.db import transaction
 from django.db.models import Sum
 from datetime import date, timedelta, datetime
-import qrcode
-import io
-import base64
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db import transaction
 from django.urls import reverse
+from types import SimpleNamespace
+import json
 import uuid
-from decimal import Decimal
-from .utils import send_wallet_sms
-
-from .utils import generate_meal_pdf  # # Ensure you created the utility file
+from . import archive, ledger
+from .departures import next_departures
+from .live import hub, event_stream, live_updates_available
+from .meal_qr import QR_FORMATS, booking_qr_image, qr_etag
+from .redemption import redeem, redeem_batch
+from .payments import record_callback
+from .exports import EXPORT_FORMATS, ExportError, export_rows
+from .exports import stream as export_stream
+from .ical import build_feed, feed_token, feed_version, user_id_for_token
+from .history import HISTORY_PAGE_SIZE, TX_TYPES, InvalidCursor, transaction_page
+from .rollups import month_bounds, monthly_summary
+from .conflicts import check_slot, describe
+from .timetable import student_timetable
+from django.utils import timezone
+
+from .utils import cached_meal_statement
 
 SSLCommerz = None
 try:
@@ -129,27 +149,54 @@ def dashboard_view(request):
 # ==========================================
 
 
+# Default number of days shown from today, and the widest range ?from=&to= may ask for
+DATE_WINDOW_DAYS = 7
+DATE_WINDOW_MAX_DAYS = 62
+
+
+def _date_window(request):
+    """Resolves the [start, end] date window from ?from=&to=, defaulting to the coming week."""
+    today = date.today()
+    try:
+        start = date.fromisoformat(request.GET["from"])
+    except (KeyError, ValueError):
+        start = today
+    try:
+        end = date.fromisoformat(request.GET["to"])
+    except (KeyError, ValueError):
+        end = start + timedelta(days=DATE_WINDOW_DAYS - 1)
+
+    if end < start:
+        start, end = end, start
+    return start, min(end, start + timedelta(days=DATE_WINDOW_MAX_DAYS - 1))
+
+
 def cafeteria_weekly_view(request):
     """Groups and sorts menus chronologically: Breakfast -> Lunch -> Snacks -> Dinner."""
-    menu_items = CafeteriaMenu.objects.all().order_by("day")
+    start, end = _date_window(request)
 
-    # Define the professional chronological order
-    meal_order = {"Breakfast": 1, "Lunch": 2, "Snacks": 3, "Dinner": 4}
+    # Ordering happens in SQL; only the columns the template renders are fetched
+    menu_rows = (
+        CafeteriaMenu.objects.window(start, end)
+        .in_meal_order()
+        .values("day", "meal_type", "description", "price")
+    )
 
     day_groups = OrderedDict()
+    for row in menu_rows:
+        day_groups.setdefault(row["day"], []).append(row)
 
-    # Sort the items using our meal_order mapping
-    sorted_menu = sorted(
-        menu_items, key=lambda x: (x.day, meal_order.get(x.meal_type, 99))
+    return render(
+        request,
+        "cafeteria_multi_day.html",
+        {
+            "day_groups": day_groups,
+            "window_start": start,
+            "window_end": end,
+            "live_updates": live_updates_available(request),
+        },
     )
 
-    for item in sorted_menu:
-        if item.day not in day_groups:
-            day_groups[item.day] = []
-        day_groups[item.day].append(item)
-
-    return render(request, "cafeteria_multi_day.html", {"day_groups": day_groups})
-
 
 @login_required
 def create_meal_booking(request):
@@ -167,27 +214,79 @@ def create_meal_booking(request):
 
 @login_required
 def booking_success_view(request):
-    # Fetch the latest booking for the user
+    # Fetch the latest booking for the user; the QR itself is served by booking_qr_view
     booking = MealBooking.objects.filter(user=request.user).latest("created_at")
+    return render(request, "booking_success.html", {"booking": booking})
 
-    # Create the data string for the QR code
-    qr_data = f"User:{booking.user.username}|Dates:{booking.date_from}-{booking.date_to}|B:{booking.breakfast}|L:{booking.lunch}|D:{booking.dinner}"
 
-    # Generate QR Code
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(qr_data)
-    qr.make(fit=True)
+def _booking_qr_etag(request, booking_id):
+    return qr_etag(booking_id, request.GET.get("format", "png"))
 
-    img = qr.make_image(fill_color="black", back_color="white")
 
-    # Save to buffer to send to template
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    qr_code_base64 = base64.b64encode(buffer.getvalue()).decode()
+@login_required
+@cache_control(private=True, max_age=60 * 60 * 24)
+@condition(etag_func=_booking_qr_etag)
+def booking_qr_view(request, booking_id):
+    """Serves the cached QR image for a booking as PNG or ?format=svg."""
+    fmt = request.GET.get("format", "png")
+    if fmt not in QR_FORMATS:
+        return HttpResponse("Unsupported format", status=400)
+
+    bookings = MealBooking.objects.filter(pk=booking_id)
+    if not request.user.is_staff:
+        bookings = bookings.filter(user=request.user)
+    if not bookings.exists():
+        raise Http404("Booking not found")
+
+    return HttpResponse(
+        booking_qr_image(booking_id, fmt), content_type=QR_FORMATS[fmt]
+    )
 
-    return render(
-        request, "booking_success.html", {"qr_code": qr_code_base64, "booking": booking}
+
+@staff_member_required
+def kitchen_headcount_report(request):
+    """Plates to cook per day and meal, read straight from the headcount rollup."""
+    start, end = _date_window(request)
+    report = OrderedDict()
+    day = start
+    while day <= end:
+        report[day] = {"day": day.isoformat(), "breakfast": 0, "lunch": 0, "dinner": 0}
+        day += timedelta(days=1)
+
+    rows = MealHeadcount.objects.filter(day__range=(start, end)).values_list(
+        "day", "meal", "count"
     )
+    for day, meal, count in rows:
+        report[day][meal] = count
+
+    return JsonResponse({"days": list(report.values())})
+
+
+@staff_member_required
+def staff_export(request, dataset):
+    """
+    Streams transactions, bookings or wallets as CSV or NDJSON, e.g.
+    ?format=ndjson&from=2026-01-01&to=2026-01-31&type=Debit. Rows are sent
+    as they are read, so large exports start at once and use flat memory.
+    """
+    fmt = request.GET.get("format", "csv")
+    try:
+        if fmt not in EXPORT_FORMATS:
+            raise ExportError(f"Unknown format '{fmt}'.")
+        start, end = (
+            date.fromisoformat(request.GET[key]) if request.GET.get(key) else None
+            for key in ("from", "to")
+        )
+        header, rows = export_rows(dataset, start, end, request.GET.get("type"))
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+    response = StreamingHttpResponse(
+        export_stream(header, rows, fmt), content_type=EXPORT_FORMATS[fmt]
+    )
+    filename = f"{dataset}-{timezone.localdate():%Y%m%d}.{fmt}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 
 # Generic view for individual meal types
@@ -210,21 +309,133 @@ def cafeteria_meal_type_view(request, meal_type):
 
 def bus_schedules_view(request):
     schedules = BusSchedule.objects.select_related("route").all()
-    return render(request, "bus_schedules.html", {"schedules": schedules})
+    subscribed_route_ids = set()
+    if request.user.is_authenticated:
+        subscribed_route_ids = set(
+            request.user.bus_subscriptions.values_list("id", flat=True)
+        )
+    return render(
+        request,
+        "bus_schedules.html",
+        {
+            "schedules": schedules,
+            "subscribed_route_ids": subscribed_route_ids,
+            "live_updates": live_updates_available(request),
+        },
+    )
 
 
-@login_required
-def class_schedules_view(request):
-    schedules = ClassSchedule.objects.select_related("course").all()
-    faculty = Faculty.objects.all()
-    return render(
-        request, "class_schedules.html", {"schedules": schedules, "faculty": faculty}
+def next_bus_json(request):
+    """Next k departures for a route, answered from the in-memory index."""
+    try:
+        route_id = int(request.GET["route"])
+        k = max(1, min(int(request.GET.get("k", 3)), 20))
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {"status": "error", "message": "route must be a route id"}, status=400
+        )
+
+    result = next_departures(route_id, timezone.localtime().time(), k)
+    if result is None:
+        return JsonResponse(
+            {"status": "error", "message": "No schedule for this route"}, status=404
+        )
+
+    return JsonResponse(
+        {
+            "route": route_id,
+            "route_name": result["route_name"],
+            "departures": [
+                {
+                    "departure": item["departure"].strftime("%H:%M"),
+                    "arrival": item["arrival"].strftime("%H:%M"),
+                    "day_offset": item["day_offset"],
+                }
+                for item in result["departures"]
+            ],
+        }
+    )
+
+
+async def live_updates(request):
+    """Server-Sent Events feed of schedule and menu changes (served under ASGI only)."""
+    if not live_updates_available(request):
+        # 204 tells EventSource clients to stop reconnecting
+        return HttpResponse(status=204)
+    queue = hub.subscribe()
+    response = StreamingHttpResponse(
+        event_stream(queue, settings.LIVE_KEEPALIVE_SECONDS),
+        content_type="text/event-stream",
     )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 @login_required
+def toggle_route_subscription(request, route_id):
+    """Subscribes or unsubscribes the user from update emails for one route."""
+    if request.method != "POST":
+        return redirect("bus_schedules")
+    route = get_object_or_404(BusRoute, pk=route_id)
+    if route.subscribers.filter(pk=request.user.pk).exists():
+        route.subscribers.remove(request.user)
+        messages.info(request, f"You will no longer receive alerts for {route}.")
+    else:
+        route.subscribers.add(request.user)
+        messages.success(request, f"Subscribed to schedule alerts for {route}.")
+    return redirect("bus_schedules")
+
+
+@login_required
+def class_schedules_view(request):
+    """The student's own week as a day x slot grid, served from the cache."""
+    context = {
+        "timetable": student_timetable(request.user),
+        "calendar_url": request.build_absolute_uri(
+            reverse("calendar_feed", args=[feed_token(request.user)])
+        ),
+    }
+    if request.user.is_staff:
+        context["schedule_form"] = ClassScheduleForm()
+    return render(request, "class_schedules.html", context)
+
+
+@staff_member_required
+@require_POST
 def add_class_schedule(request):
-    # Logic for adding schedules can be expanded here
+    """Adds a class slot unless it double-books the faculty member or the room."""
+    form = ClassScheduleForm(request.POST)
+    if form.is_valid():
+        data = form.cleaned_data
+        with transaction.atomic():
+            # A room clash can involve any lecturer, so slots with a room
+            # serialise against every add; otherwise only this lecturer's matter
+            lecturers = Faculty.objects.select_for_update().order_by("pk")
+            if not data["room"]:
+                lecturers = lecturers.filter(pk=data["course"].faculty_id)
+            list(lecturers.values_list("pk", flat=True))
+
+            # Re-checked under the lock; the form's check may already be stale
+            conflicts = check_slot(
+                data["course"],
+                data["day_of_week"],
+                data["start_time"],
+                data["end_time"],
+                data["room"],
+            )
+            if not conflicts:
+                schedule = form.save()
+                messages.success(
+                    request, f"Added {schedule.course.code} on {schedule.day_of_week}."
+                )
+                return redirect("class_schedules")
+        errors = [describe(conflict) for conflict in conflicts]
+    else:
+        errors = [error for field in form.errors.values() for error in field]
+
+    for error in errors:
+        messages.error(request, error)
     return redirect("class_schedules")
 
 
@@ -233,6 +444,37 @@ def add_class_schedule(request):
 # ==========================================
 
 
+def _calendar_version(request, token):
+    # etag_func and last_modified_func share one lookup per request
+    if not hasattr(request, "_calendar_version"):
+        user_id = user_id_for_token(token)
+        request._calendar_version = (
+            feed_version(user_id) if user_id is not None else (None, None)
+        )
+    return request._calendar_version
+
+
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=lambda request, token: _calendar_version(request, token)[0],
+    last_modified_func=lambda request, token: _calendar_version(request, token)[1],
+)
+def calendar_feed(request, token):
+    """
+    A user's classes, bus departures and campus events as iCalendar. Polls
+    that present the current ETag get 304 without the feed being built.
+    """
+    user_id = user_id_for_token(token)
+    if user_id is None:
+        raise Http404("Unknown calendar")
+    _, last_modified = _calendar_version(request, token)
+    response = HttpResponse(
+        build_feed(user_id, last_modified), content_type="text/calendar; charset=utf-8"
+    )
+    response["Content-Disposition"] = 'inline; filename="campus.ics"'
+    return response
+
+
 def events_view(request):
     events = Event.objects.all().order_by("event_date")
     clubs = Club.objects.all()
@@ -269,61 +511,142 @@ def send_booking_email(user, booking, qr_image_base64):
 
 
 @staff_member_required
+def cafeteria_scanner_view(request):
+    return render(
+        request, "cafeteria_scanner.html", {"redeem_batch_max": REDEEM_BATCH_MAX}
+    )
+
+
+@staff_member_required
+@require_POST
 def verify_meal_qr(request):
-    """Secure endpoint for cafeteria staff to verify meal codes."""
-    qr_data = request.GET.get("data")
+    """Secure endpoint for cafeteria staff to verify and redeem meal codes."""
+    result = redeem(
+        request.POST.get("data", ""),
+        meal=request.POST.get("meal") or None,
+        station=request.POST.get("station", "")[:50],
+    )
+    status_codes = {"success": 200, "duplicate": 409}
+    return JsonResponse(result, status=status_codes.get(result["status"], 400))
 
-    try:
-        # Expected format from our generator: User:rakib|Dates:2026-02-24-2026-02-25|B:True|L:True|D:False
-        parts = dict(item.split(":") for item in qr_data.split("|"))
-        username = parts.get("User")
 
-        # In a production app, you would query the database here to check if
-        # this specific booking ID has already been 'used' for today.
+# Upper bound on scans accepted in one station flush
+REDEEM_BATCH_MAX = 500
 
+
+@staff_member_required
+@require_POST
+def redeem_meal_batch(request):
+    """Applies a scanner station's offline queue of timestamped scans at once."""
+    try:
+        payload = json.loads(request.body)
+        station = str(payload.get("station", ""))[:50]
+        scans = []
+        for scan in payload["scans"]:
+            scanned_at = scan.get("scanned_at")
+            if scanned_at:
+                scanned_at = datetime.fromisoformat(scanned_at)
+                if timezone.is_naive(scanned_at):
+                    scanned_at = timezone.make_aware(scanned_at)
+            scans.append(
+                {
+                    "data": scan.get("data"),
+                    "meal": scan.get("meal") or None,
+                    "scanned_at": scanned_at,
+                }
+            )
+    except (ValueError, KeyError, TypeError, AttributeError):
         return JsonResponse(
-            {
-                "status": "success",
-                "message": f"Valid Booking for {username}",
-                "details": parts,
-            }
-        )
-    except Exception:
-        return JsonResponse(
-            {"status": "error", "message": "Invalid or Corrupted QR Code"}, status=400
+            {"status": "error", "message": "Malformed scan batch"}, status=400
         )
+    if len(scans) > REDEEM_BATCH_MAX:
+        message = f"At most {REDEEM_BATCH_MAX} scans per batch"
+        return JsonResponse({"status": "error", "message": message}, status=400)
 
+    results = redeem_batch(scans, station=station)
+    return JsonResponse(
+        {
+            "status": "success",
+            "results": [
+                {"id": scan.get("id"), **result}
+                for scan, result in zip(payload["scans"], results)
+            ],
+        }
+    )
 
-@login_required
-def process_meal_payment(request, amount):
-    """Atomic transaction to ensure data integrity during payment."""
+
+def process_meal_payment(user, amount):
+    """Debits a meal payment through the ledger; False if the wallet cannot cover it."""
     try:
-        with transaction.atomic():
-            wallet = request.user.studentwallet
-            if wallet.balance >= amount:
-                wallet.balance -= amount
-                wallet.save()
-
-                Transaction.objects.create(
-                    wallet=wallet,
-                    amount=amount,
-                    tx_type="Debit",
-                    description="Meal Booking Payment",
-                )
-                return True
-            return False
-    except StudentWallet.DoesNotExist:
+        ledger.apply(
+            user.studentwallet.pk,
+            amount,
+            ledger.DEBIT,
+            description="Meal Booking Payment",
+        )
+        return True
+    except (StudentWallet.DoesNotExist, ledger.InsufficientFunds):
         return False
 
 
+def _history_month(request):
+    """Optional ?month=YYYY-MM; archived months are read from cold storage."""
+    value = request.GET.get("month")
+    return datetime.strptime(value, "%Y-%m").date() if value else None
+
+
+def _history_context(request):
+    wallet = request.user.studentwallet
+    # Get transaction type from query params (All, Credit, or Debit)
+    tx_type = request.GET.get("type")
+    try:
+        month = _history_month(request)
+    except ValueError:
+        month = None
+    try:
+        transactions, next_cursor = transaction_page(
+            wallet.pk, request.GET.get("cursor"), tx_type, month=month
+        )
+    except InvalidCursor:
+        transactions, next_cursor = transaction_page(
+            wallet.pk, None, tx_type, month=month
+        )
+    return {
+        "transactions": transactions,
+        "wallet": wallet,
+        "current_filter": tx_type if tx_type in TX_TYPES else None,
+        "current_month": month,
+        "next_cursor": next_cursor,
+    }
+
+
 @login_required
 def transaction_history_view(request):
-    """Retrieves all wallet activity for the logged-in user."""
-    wallet = request.user.studentwallet
-    transactions = wallet.transactions.all().order_by("-timestamp")
-    return render(
-        request, "transactions.html", {"transactions": transactions, "wallet": wallet}
-    )
+    """Retrieves wallet activity for the logged-in user, one page at a time."""
+    return render(request, "transactions.html", _history_context(request))
+
+
+@login_required
+def transaction_history_json(request):
+    """Keyset-paginated wallet history: follow next_cursor for older rows."""
+    try:
+        limit = int(request.GET.get("limit", HISTORY_PAGE_SIZE))
+        rows, next_cursor = transaction_page(
+            request.user.studentwallet.pk,
+            request.GET.get("cursor"),
+            request.GET.get("type"),
+            limit,
+            month=_history_month(request),
+        )
+    except (ValueError, InvalidCursor):
+        return JsonResponse(
+            {"status": "error", "message": "Invalid cursor, limit or month"},
+            status=400,
+        )
+    for row in rows:
+        row["timestamp"] = row["timestamp"].isoformat()
+        row["amount"] = str(row["amount"])
+    return JsonResponse({"transactions": rows, "next_cursor": next_cursor})
 
 
 # Payment gateway integration example (SSLCommerz)
@@ -366,6 +689,9 @@ def initiate_payment(request):
         "total_amount": 500.00,
         "currency": "BDT",
         "tran_id": str(uuid.uuid4())[:10],
+        # Echoed back in the IPN so the worker knows which wallet to credit
+        "value_a": str(request.user.studentwallet.pk),
+        "ipn_url": request.build_absolute_uri(reverse("payment_ipn")),
         "success_url": "http://127.0.0.1:8000/payment/success/",
         "fail_url": "http://127.0.0.1:8000/payment/fail/",
         "cancel_url": "http://127.0.0.1:8000/payment/cancel/",
@@ -409,68 +735,94 @@ def initiate_payment(request):
 def download_meal_summary(request):
     """Filters transactions by month and generates PDF."""
     # Get month from GET request, default to current month
-    selected_month = request.GET.get("month", datetime.now().month)
+    # Accepts a month number of this year, or YYYY-MM for earlier years
+    today = timezone.localdate()
+    selected = request.GET.get("month", str(today.month))
+    try:
+        if "-" in selected:
+            month = datetime.strptime(selected, "%Y-%m").date()
+        else:
+            month = date(today.year, int(selected), 1)
+    except ValueError:
+        month = today.replace(day=1)
     wallet = request.user.studentwallet
 
-    # Filter for 'Debit' transactions in the selected month
-    transactions = wallet.transactions.filter(
-        tx_type="Debit",
-        timestamp__month=selected_month,
-        timestamp__year=datetime.now().year,
-    ).order_by("-timestamp")
+    # Header total comes from the monthly rollup instead of summing rows
+    total_spent = monthly_summary(wallet.pk, month).debit_total
 
-    total_spent = sum(tx.amount for tx in transactions)
+    if archive.is_archived(month):
+        # Archived months never change, so one rendering serves every download
+        version = "archived"
 
-    # Generate PDF using the filtered data
-    pdf_buffer = generate_meal_pdf(request.user, transactions, total_spent)
+        def rows():
+            return (
+                SimpleNamespace(**row)
+                for row in archive.month_rows(wallet.pk, month, "Debit")
+            )
+    else:
+        # Half-open timestamp range so the (wallet, timestamp) index is used
+        start, end = month_bounds(month)
+        debits = wallet.transactions.filter(
+            tx_type="Debit", timestamp__gte=start, timestamp__lt=end
+        )
+        # Re-rendered only when a newer debit lands in the month
+        version = debits.order_by("-id").values_list("id", flat=True).first()
+
+        def rows():
+            return (
+                debits.order_by("-timestamp", "-id")
+                .only("timestamp", "description", "amount")
+                .iterator(chunk_size=500)
+            )
+
+    statement = cached_meal_statement(request.user, month, version, rows, total_spent)
 
-    month_name = datetime.strptime(str(selected_month), "%m").strftime("%B")
     return FileResponse(
-        pdf_buffer,
+        statement,
         as_attachment=True,
-        filename=f"Meal_Summary_{month_name}_{request.user.username}.pdf",
+        filename=f"Meal_Summary_{month:%B}_{request.user.username}.pdf",
     )
 
 
+@csrf_exempt
+@require_POST
+def payment_ipn(request):
+    """
+    Instant Payment Notification from SSLCommerz. The payload is only recorded
+    in the inbox here; `manage.py process_payments` validates and credits it.
+    """
+    callback, created = record_callback(request.POST.dict())
+    if callback is None:
+        return JsonResponse({"status": "error", "message": "Missing tran_id"}, status=400)
+    return JsonResponse({"status": "accepted" if created else "duplicate"})
+
+
+@csrf_exempt
 @login_required
 def payment_success(request):
     """
-    Handles the successful payment callback from SSLCommerz.
-    Updates the balance and sends an automated SMS.
+    Landing page after SSLCommerz redirects the student back. The gateway's
+    POST is queued like an IPN; the wallet is credited by the payment worker,
+    so refreshing this page can never credit twice.
     """
-    # Capture transaction data (SSLCommerz typically sends this via POST)
-    amount_str = request.POST.get("amount") or request.GET.get("amount", "500.00")
-    tran_id = request.POST.get("tran_id") or request.GET.get("tran_id", "TXN_SUCCESS")
-    amount = Decimal(amount_str)
-
-    # Use atomic transaction to ensure both balance and log are updated together
-    with transaction.atomic():
-        wallet = request.user.studentwallet
-        wallet.balance += amount
-        wallet.save()
-
-        # Log the credit transaction
-        Transaction.objects.create(
-            wallet=wallet,
-            amount=amount,
-            tx_type="Credit",
-            description=f"SSLCommerz Top-up | ID: {tran_id}",
-        )
+    if request.method == "POST":
+        callback, _ = record_callback(request.POST.dict())
+    else:
+        callback = PaymentCallback.objects.filter(
+            tran_id=request.GET.get("tran_id", "")
+        ).first()
 
-    # Trigger Auto-SMS Notification
-    try:
-        # Fetch phone number from the linked Profile
-        profile = request.user.profile
-        if profile.phone_number:
-            send_wallet_sms(profile.phone_number, amount, wallet.balance)
-    except (Profile.DoesNotExist, Exception):
-        # Fail silently if profile isn't set up yet so the user still sees success page
-        pass
+    wallet = request.user.studentwallet
+    if callback is None or str(callback.payload.get("value_a")) != str(wallet.pk):
+        return render(request, "payment_status.html", {"status": "Error"})
 
+    status = {"credited": "Success", "pending": "Processing"}.get(
+        callback.status, "Error"
+    )
     context = {
-        "status": "Success",
-        "amount": amount,
-        "tran_id": tran_id,
+        "status": status,
+        "amount": callback.payload.get("amount"),
+        "tran_id": callback.tran_id,
         "new_balance": wallet.balance,
     }
     # Path matches your current template structure
@@ -595,17 +947,4 @@ def profile_update(request):
 @login_required
 def transaction_history(request):
     """Provides a full audit trail of wallet activity."""
-    wallet = request.user.studentwallet
-    # Get transaction type from query params (All, Credit, or Debit)
-    tx_type = request.GET.get("type")
-
-    transactions = wallet.transactions.all().order_by("-timestamp")
-
-    if tx_type in ["Credit", "Debit"]:
-        transactions = transactions.filter(tx_type=tx_type)
-
-    return render(
-        request,
-        "transactions.html",
-        {"transactions": transactions, "wallet": wallet, "current_filter": tx_type},
-    )
+    return render(request, "transactions.html", _history_context(request))
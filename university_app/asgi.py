@@ -3,6 +3,10 @@ ASGI config for university_app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve with an ASGI server (e.g. ``uvicorn university_app.asgi:application``)
+so the /live/ Server-Sent Events feed holds idle connections on the event
+loop instead of one thread each.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
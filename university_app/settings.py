@@ -124,6 +124,16 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, "services", "static")]
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Rendered PDF statements; kept outside MEDIA_ROOT so they are never served publicly
+STATEMENT_CACHE_DIR = os.path.join(BASE_DIR, "statement_cache")
+# Cold storage for archived Transaction months (manage.py archive_transactions)
+TRANSACTION_ARCHIVE_DIR = os.path.join(BASE_DIR, "transaction_archive")
+TRANSACTION_HOT_MONTHS = 12
+# Per-student timetable grids; edits expire them, so this is only a backstop
+TIMETABLE_CACHE_SECONDS = 7 * 24 * 60 * 60
+# .ics feeds: weekly classes and daily buses recur from the term start
+CALENDAR_TERM_START = os.environ.get("CALENDAR_TERM_START", "2026-01-01")
+CALENDAR_TERM_WEEKS = 16
 
 # Authentication Flow
 LOGIN_URL = "/login/"
@@ -138,6 +148,16 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 
+# Bus update digests: saves within the window are merged into one email per rider
+BUS_NOTIFY_DIGEST_SECONDS = 60
+BUS_NOTIFY_CHUNK_SIZE = 100
+# Upper bound on how stale another worker's next-departure index may get
+BUS_INDEX_TTL_SECONDS = 300
+
+# Server-Sent Events feed (services.live): per-client queue bound and keep-alive interval
+LIVE_QUEUE_SIZE = 32
+LIVE_KEEPALIVE_SECONDS = 25
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # SSLCommerz Configuration from .env
@@ -146,7 +166,25 @@ SSLCOMMERZ_STORE_ID = os.environ.get("SSLCOMMERZ_STORE_ID")
 SSLCOMMERZ_STORE_PASS = os.environ.get("SSLCOMMERZ_STORE_PASS")
 SSLCOMMERZ_SANDBOX = os.environ.get("SSLCOMMERZ_SANDBOX") == "True"
 
+# Payment callback worker (manage.py process_payments). Point PAYMENT_VALIDATOR at
+# services.payments.LocalGatewayStandIn to run the pipeline without SSLCommerz.
+PAYMENT_VALIDATOR = os.environ.get(
+    "PAYMENT_VALIDATOR", "services.payments.SSLCommerzValidator"
+)
+PAYMENT_BATCH_SIZE = 100
+PAYMENT_MAX_ATTEMPTS = 5
+# How long a worker owns a claimed callback; also the wait between gateway retries
+PAYMENT_CLAIM_SECONDS = 60
+
 
 TWILIO_ACCOUNT_SID = "your_sid_here"
 TWILIO_AUTH_TOKEN = "your_auth_token_here"
 TWILIO_PHONE_NUMBER = "+1234567890"  # Your Twilio number
+
+# Wallet SMS alerts (services.sms). Use services.sms.LocalSMSBackend to keep
+# messages in memory instead of sending them.
+SMS_BACKEND = os.environ.get("SMS_BACKEND", "services.sms.TwilioBackend")
+SMS_COALESCE_SECONDS = 5
+SMS_MAX_CONCURRENCY = 4
+SMS_MAX_ATTEMPTS = 3
+SMS_RETRY_BACKOFF_SECONDS = 1.0